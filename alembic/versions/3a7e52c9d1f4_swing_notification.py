@@ -0,0 +1,34 @@
+"""swing notification outbox
+
+Revision ID: 3a7e52c9d1f4
+Revises: 68a98917235f
+Create Date: 2026-10-18 11:52:40.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a7e52c9d1f4'
+down_revision: Union[str, None] = '68a98917235f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('swing_notification',
+    sa.Column('swing_id', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt', sa.DateTime(), server_default=sa.text('LOCALTIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['swing_id'], ['swing.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('swing_id')
+    )
+    op.create_index('ix_swing_notification_next_attempt', 'swing_notification', ['next_attempt'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_swing_notification_next_attempt', table_name='swing_notification')
+    op.drop_table('swing_notification')
@@ -0,0 +1,34 @@
+"""backfill checkpoint
+
+Revision ID: 68a98917235f
+Revises: dc23e382a6cc
+Create Date: 2026-10-18 11:31:08.402671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '68a98917235f'
+down_revision: Union[str, None] = 'dc23e382a6cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('backfill_checkpoint',
+    sa.Column('tradepair_name', sa.String(length=20), nullable=False),
+    sa.Column('timeframe_name', sa.String(length=10), nullable=False),
+    sa.Column('datetime_open', sa.DateTime(), nullable=False),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['timeframe_name'], ['timeframe.name'], ),
+    sa.ForeignKeyConstraint(['tradepair_name'], ['tradepair.name'], ),
+    sa.PrimaryKeyConstraint('tradepair_name', 'timeframe_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_checkpoint')
@@ -0,0 +1,33 @@
+"""swing watermark
+
+Revision ID: 6e0fbc551d98
+Revises: 1f8339c84df6
+Create Date: 2026-10-18 10:45:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e0fbc551d98'
+down_revision: Union[str, None] = '1f8339c84df6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('swing_watermark',
+    sa.Column('tradepair_name', sa.String(length=20), nullable=False),
+    sa.Column('timeframe_name', sa.String(length=10), nullable=False),
+    sa.Column('datetime_open', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['timeframe_name'], ['timeframe.name'], ),
+    sa.ForeignKeyConstraint(['tradepair_name'], ['tradepair.name'], ),
+    sa.PrimaryKeyConstraint('tradepair_name', 'timeframe_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('swing_watermark')
@@ -0,0 +1,37 @@
+"""updater worker shard leases
+
+Revision ID: b81f4c0e6a27
+Revises: 3a7e52c9d1f4
+Create Date: 2026-10-18 12:14:07.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4c0e6a27'
+down_revision: Union[str, None] = '3a7e52c9d1f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('updater_worker',
+    sa.Column('id', sa.String(length=100), nullable=False),
+    sa.Column('heartbeat', sa.DateTime(), server_default=sa.text('LOCALTIMESTAMP'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('shard_lease',
+    sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('worker_id', sa.String(length=100), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('shard')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('shard_lease')
+    op.drop_table('updater_worker')
@@ -0,0 +1,36 @@
+"""swing identity
+
+Revision ID: d9be47ab9ee1
+Revises: 6e0fbc551d98
+Create Date: 2026-10-18 10:52:40.117562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9be47ab9ee1'
+down_revision: Union[str, None] = '6e0fbc551d98'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # legacy swings were linked to every candle of their series, their pivot cannot be recovered:
+    # drop them and reset the watermarks, the next update detects them again from the candles,
+    # as the history of series scanned for the first time, without alerting the bot
+    op.execute("DELETE FROM swing_candle_link")
+    op.execute("DELETE FROM swing")
+    op.execute("DELETE FROM swing_watermark")
+
+    op.add_column('swing', sa.Column('pivot_datetime_open', sa.DateTime(), nullable=False))
+    op.create_index('ix_swing_identity', 'swing',
+                    ['tradepair_name', 'timeframe_name', 'orientation_up', 'pivot_datetime_open'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_swing_identity', table_name='swing')
+    op.drop_column('swing', 'pivot_datetime_open')
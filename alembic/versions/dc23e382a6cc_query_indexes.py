@@ -0,0 +1,48 @@
+"""query indexes
+
+Revision ID: dc23e382a6cc
+Revises: d9be47ab9ee1
+Create Date: 2026-10-18 11:04:27.552913
+
+`selectCandles` filters by tradepair and timeframe and orders by
+`datetime_open`, which the candle primary key already serves. Swing detection
+(`selectCandleSeries`) reads only highs and lows, a covering index turns its
+scattered heap reads into an index-only scan.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc23e382a6cc'
+down_revision: Union[str, None] = 'd9be47ab9ee1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # built concurrently so the updater can keep writing while the indexes are created
+    with op.get_context().autocommit_block():
+        op.create_index('ix_candle_series_extremes', 'candle',
+                        ['tradepair_name', 'timeframe_name', 'datetime_open'],
+                        postgresql_include=['high', 'low'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_swing_series_id', 'swing',
+                        ['tradepair_name', 'timeframe_name', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_swing_candle_link_candle', 'swing_candle_link',
+                        ['candle_tradepair', 'candle_timeframe', 'candle_datetime_open'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_swing_candle_link_candle', table_name='swing_candle_link',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_swing_series_id', table_name='swing',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_candle_series_extremes', table_name='candle',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,26 @@
+"""swing notification creation time
+
+Revision ID: e4d09a1b7c35
+Revises: b81f4c0e6a27
+Create Date: 2026-10-18 12:41:26.904371
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4d09a1b7c35'
+down_revision: Union[str, None] = 'b81f4c0e6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('swing_notification', sa.Column('created_at', sa.DateTime(), server_default=sa.text('LOCALTIMESTAMP'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('swing_notification', 'created_at')
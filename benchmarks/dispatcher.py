@@ -0,0 +1,100 @@
+"""
+Delivery of a burst of swing alerts through `bot.dispatcher.SwingDispatcher`
+against the local Bot API stand-in, compared with sending every post as is.
+
+The updater posts the swings of an update in batches, a backfill posts
+thousands of them at once. The benchmark replays such a burst and checks
+that every swing reaches the chat exactly once, in messages Telegram
+accepts, and reports how many messages, flood waits and seconds it took.
+
+    python -m benchmarks.dispatcher --swings 3000 --posts 30
+"""
+import os
+import time
+import asyncio
+import argparse
+
+from benchmarks.fake_telegram import FakeTelegram
+
+
+def swingBurst(count: int) -> list[dict]:
+    return [
+        {'tradepair': f"SYM{i % 400:04d}USDT", 'timeframe': ('1h', '4h', '1d')[i % 3],
+         'swing_type': 'high' if i % 2 else 'low'}
+        for i in range(count)
+    ]
+
+def delivered(stand_in: FakeTelegram) -> list[str]:
+    """Swing lines of the accepted messages, without the titles and headers"""
+    from bot.dispatcher import SWINGS_HEADER
+    return [line for message in stand_in.messages for line in message['text'].split('\n')
+            if ' | ' in line and line != SWINGS_HEADER]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Telegram alert dispatcher against a Bot API stand-in")
+    parser.add_argument("--swings", type=int, default=3000)
+    parser.add_argument("--posts", type=int, default=30, help="posts the swings are split into")
+    parser.add_argument("--chat-interval", type=float, default=1, help="seconds between messages of a chat")
+    parser.add_argument("--window", type=float, default=0.5, help="dispatcher coalescing window")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:bench")
+    os.environ.setdefault("CONTROL_BOT_TOKEN", "2:bench")
+    os.environ.setdefault("ADMIN_ID", "42")
+    os.environ.setdefault("UPDATER_SERVER_URL", "127.0.0.1:0")
+    os.makedirs("logs", exist_ok=True)
+
+    from telegram import Bot
+    from telegram.error import TelegramError
+    from bot.dispatcher import SwingDispatcher, formatSwing
+
+    swings = swingBurst(args.swings)
+    posts = [swings[i::args.posts] for i in range(args.posts)]
+    expected = sorted(formatSwing(swing) for swing in swings)
+
+    #? the previous handler: a count message and one unbounded list per post
+    stand_in = FakeTelegram(chat_interval=args.chat_interval).start()
+
+    async def direct():
+        bot = Bot("2:bench", base_url=stand_in.url)
+        failed = 0
+        for post in posts:
+            for text in (f"New Swings Alert:\n{len(post)}",
+                         "Tradepair | Timeframe | Orientation\n" + '\n'.join(map(formatSwing, post))):
+                try:
+                    await bot.send_message(chat_id=42, text=text)
+                except TelegramError:
+                    failed += 1
+        await bot.shutdown()
+        return failed
+
+    started = time.perf_counter()
+    failed = asyncio.run(direct())
+    direct_result = (time.perf_counter() - started, len(stand_in.messages), failed, len(delivered(stand_in)))
+    stand_in.stop()
+
+    stand_in = FakeTelegram(chat_interval=args.chat_interval).start()
+    dispatcher = SwingDispatcher(Bot("2:bench", base_url=stand_in.url), 42, window=args.window).start()
+    started = time.perf_counter()
+    for post in posts:
+        dispatcher.submit(post)
+        time.sleep(0.01)
+    while not dispatcher.idle():
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    dispatcher.stop()
+
+    lines = delivered(stand_in)
+    assert sorted(lines) == expected, "every swing has to be delivered exactly once"
+    assert all(len(message['text']) <= 4096 for message in stand_in.messages)
+
+    print(f"{args.swings} swings in {args.posts} posts, a message per {args.chat_interval} s per chat\n")
+    print(f"  {'':<12}{'seconds':>9}{'messages':>10}{'failed':>8}{'swings delivered':>18}{'429s':>6}")
+    print(f"  {'direct':<12}{direct_result[0]:>9.2f}{direct_result[1]:>10}{direct_result[2]:>8}{direct_result[3]:>18}{'':>6}")
+    print(f"  {'dispatcher':<12}{elapsed:>9.2f}{dispatcher.counters['messages']:>10}"
+          f"{dispatcher.counters['dropped']:>8}{len(lines):>18}{stand_in.counters['429']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Local stand-in for the Binance market data endpoints used by the updater
+(`exchangeInfo` and `klines`).
+
+Prices are a deterministic function of the symbol and the kline open time,
+so every run and every paging pattern sees the same history. The clock of
+the stand-in can lag behind the real one and be advanced interval by
+interval to simulate new candles closing.
+
+    python -m benchmarks.fake_binance --symbols 300 --history 1000 --latency 20 --rate-limit 0.01
+    BINANCE_API_URL=http://127.0.0.1:8899/api/v3 python manager.py ...
+"""
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+INTERVALS_MS = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000, '3d': 259_200_000,
+    '1w': 604_800_000,
+}
+#? the unix epoch is a thursday, binance weeks start on monday
+WEEK_ANCHOR_MS = 4 * 86_400_000
+WEIGHT_WINDOW_MS = 60_000
+WEIGHTS = {'exchangeInfo': 20, 'klines': 2}
+
+
+class FakeBinance:
+    """
+    Configurable Binance stand-in served from a background thread.
+
+    Parameters
+    ----------
+    symbols : int
+        Number of USDT tradepairs listed by `exchangeInfo`.
+    history : int
+        Closed klines available per symbol and interval, counted back from the clock.
+    latency : float
+        Seconds every response is delayed by.
+    rate_limit : float
+        Probability of answering a request with a 429.
+    ban : float
+        Probability of answering a request with a 418.
+    weight_limit : int
+        Weight per minute after which every request gets a 429, like the real API.
+    retry_after : int
+        `Retry-After` seconds sent with injected 429/418 responses.
+    lag : int
+        Milliseconds the stand-in clock runs behind the real one, see `advance()`.
+    """
+
+    def __init__(self, symbols: int = 100, history: int = 500, latency: float = 0,
+                 rate_limit: float = 0, ban: float = 0, weight_limit: int = 6000,
+                 retry_after: int = 1, lag: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.symbols = [f"SYM{i:04d}USDT" for i in range(symbols)]
+        self.history = history
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.ban = ban
+        self.weight_limit = weight_limit
+        self.retry_after = retry_after
+        self.lag = lag
+        self.random = random.Random(0)
+
+        self.lock = threading.Lock()
+        self.window = 0
+        self.used_weight = 0
+        self.counters = {'requests': 0, '429': 0, '418': 0}
+
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/api/v3"
+
+    def start(self) -> "FakeBinance":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def now(self) -> int:
+        return int(time.time() * 1000) - self.lag
+
+    def advance(self, milliseconds: int):
+        """Move the clock forward, klines closing in between become available"""
+        self.lag = max(self.lag - milliseconds, 0)
+
+    #? responses
+
+    def spend(self, weight: int) -> tuple[int, int]:
+        """Count the weight of a request, returns the status to answer with and the used weight"""
+        with self.lock:
+            self.counters['requests'] += 1
+            window = int(time.time() * 1000) // WEIGHT_WINDOW_MS
+            if window != self.window:
+                self.window, self.used_weight = window, 0
+            self.used_weight += weight
+
+            if self.used_weight > self.weight_limit or self.random.random() < self.rate_limit:
+                self.counters['429'] += 1
+                return 429, self.used_weight
+            if self.random.random() < self.ban:
+                self.counters['418'] += 1
+                return 418, self.used_weight
+            return 200, self.used_weight
+
+    def exchangeInfo(self, params: dict) -> list:
+        return {'symbols': [{'symbol': symbol, 'status': 'TRADING'} for symbol in self.symbols]}
+
+    def openTime(self, interval_name: str, offset: int = 0) -> int:
+        """Open time of the kline still in progress, aligned like the real api to a UTC `offset` in milliseconds"""
+        interval = INTERVALS_MS[interval_name]
+        anchor = WEEK_ANCHOR_MS if interval_name == '1w' else 0
+        return (self.now() + offset - anchor) // interval * interval - offset + anchor
+
+    def klines(self, params: dict) -> list:
+        symbol = params['symbol']
+        interval = INTERVALS_MS[params['interval']]
+        limit = min(int(params.get('limit', 500)), 1000)
+        offset = int(float(params.get('timeZone', 0)) * 3_600_000)
+
+        current = self.openTime(params['interval'], offset)
+        first = current - self.history * interval
+
+        if 'startTime' in params:
+            start = max(first, math.ceil((int(params['startTime']) - first) / interval) * interval + first)
+        elif 'endTime' in params:
+            end = first + (min(current, int(params['endTime'])) - first) // interval * interval
+            start = max(first, end - (limit - 1) * interval)
+        else:
+            start = max(first, current - (limit - 1) * interval)
+
+        return [
+            self.kline(symbol, open_time, interval)
+            for open_time in range(start, min(start + limit * interval, current + interval), interval)
+        ]
+
+    def kline(self, symbol: str, open_time: int, interval: int) -> list:
+        index = open_time // interval
+        seed = sum(map(ord, symbol))
+        noise = random.Random(seed * 1_000_003 + index)
+
+        base = 10 + seed % 90
+        trend = 1 + 0.3 * math.sin(index / 17 + seed) + 0.1 * math.sin(index / 5.3 + seed / 7)
+        open_price = base * trend
+        close_price = open_price * (1 + noise.uniform(-0.03, 0.03))
+        high = max(open_price, close_price) * (1 + noise.uniform(0, 0.02))
+        low = min(open_price, close_price) * (1 - noise.uniform(0, 0.02))
+        volume = noise.uniform(100, 10000)
+        return [
+            open_time, f"{open_price:.8f}", f"{high:.8f}", f"{low:.8f}", f"{close_price:.8f}",
+            f"{volume:.8f}", open_time + interval - 1, f"{volume * open_price:.8f}",
+            noise.randint(10, 1000), f"{volume / 2:.8f}", f"{volume * open_price / 2:.8f}", "0",
+        ]
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                endpoint = url.path.rsplit('/', 1)[-1]
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                if endpoint not in WEIGHTS:
+                    return self.reply(404, {'code': -1, 'msg': 'Unknown endpoint'})
+
+                status, used_weight = stand_in.spend(WEIGHTS[endpoint])
+                headers = {'X-MBX-USED-WEIGHT-1M': str(used_weight)}
+                if status != 200:
+                    headers['Retry-After'] = str(stand_in.retry_after)
+                    return self.reply(status, {'code': -1003, 'msg': 'Too many requests'}, headers)
+
+                try:
+                    body = getattr(stand_in, endpoint)(params)
+                except (KeyError, ValueError) as err:
+                    return self.reply(400, {'code': -1102, 'msg': f'Bad parameter {err}'}, headers)
+                self.reply(200, body, headers)
+
+            def reply(self, status: int, body, headers: dict = None):
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local Binance stand-in")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--history", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0, help="response delay in milliseconds")
+    parser.add_argument("--rate-limit", type=float, default=0, help="share of requests answered with 429")
+    parser.add_argument("--ban", type=float, default=0, help="share of requests answered with 418")
+    parser.add_argument("--weight-limit", type=int, default=6000)
+    args = parser.parse_args()
+
+    stand_in = FakeBinance(symbols=args.symbols, history=args.history, latency=args.latency / 1000,
+                           rate_limit=args.rate_limit, ban=args.ban, weight_limit=args.weight_limit,
+                           port=args.port)
+    print(f"Serving {len(stand_in.symbols)} symbols on {stand_in.url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
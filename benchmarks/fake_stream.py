@@ -0,0 +1,193 @@
+"""
+Local stand-in for the Binance combined kline streams, driven by the clock
+and the deterministic prices of a `FakeBinance`.
+
+Subscribed streams get an update of their open kline every couple of
+seconds, like the real streams, and a closed kline event as soon as the
+stand-in clock passes its close time. Connections can be dropped and
+refused for a while to exercise reconnection.
+
+    python -m benchmarks.fake_stream --symbols 300
+    BINANCE_STREAM_URL=ws://127.0.0.1:8898/stream python manager.py start stream
+"""
+import json
+import time
+import argparse
+import threading
+
+from websockets.sync.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from benchmarks.fake_binance import FakeBinance, INTERVALS_MS
+
+#? seconds between updates of an open kline
+UPDATE_INTERVAL = 2
+#? seconds between checks for closed klines
+CLOSE_RESOLUTION = 0.05
+
+
+#? the only timezone binance documents for kline streams
+STREAM_TIMEZONES = {'+08:00': 8 * 3_600_000}
+
+
+def parseStreamName(name: str) -> tuple[str, str, int]:
+    """Symbol, interval and UTC offset in milliseconds of `<symbol>@kline_<interval>[@+08:00]`"""
+    symbol, kline, *timezone = name.split('@')
+    offset = 0
+    if timezone:
+        if timezone[0] not in STREAM_TIMEZONES:
+            raise ValueError(f"Unsupported stream timezone {timezone[0]}")
+        offset = STREAM_TIMEZONES[timezone[0]]
+    return symbol.upper(), kline.removeprefix('kline_'), offset
+
+
+class FakeStream:
+    """
+    Combined stream stand-in served from background threads.
+
+    Parameters
+    ----------
+    binance : FakeBinance
+        Source of the clock and of the kline prices.
+    """
+
+    def __init__(self, binance: FakeBinance, host: str = "127.0.0.1", port: int = 0):
+        self.binance = binance
+
+        self.lock = threading.Lock()
+        #? open time of the last kline sent per stream of every connection
+        self.connections = {}
+        self.refused_until = 0
+        self.counters = {'connections': 0, 'refused': 0, 'closed': 0, 'updates': 0}
+
+        self.stopped = threading.Event()
+        self.server = serve(self.handler, host, port)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}/stream"
+
+    def start(self) -> "FakeStream":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.server.shutdown()
+
+    def drop(self, outage: float = 0):
+        """Close every connection and refuse new ones for `outage` seconds"""
+        with self.lock:
+            self.refused_until = time.monotonic() + outage
+            connections = list(self.connections)
+        for connection in connections:
+            connection.close(1001, "going away")
+
+    #? connections
+
+    def handler(self, connection):
+        with self.lock:
+            if time.monotonic() < self.refused_until:
+                self.counters['refused'] += 1
+                connection.close(1013, "try again later")
+                return
+            self.counters['connections'] += 1
+            self.connections[connection] = {}
+
+        try:
+            for message in connection:
+                request = json.loads(message)
+                reply = {'result': None, 'id': request.get('id')}
+                with self.lock:
+                    streams = self.connections[connection]
+                    match request.get('method'):
+                        case 'SUBSCRIBE':
+                            try:
+                                parsed = [(name, *parseStreamName(name)) for name in request['params']]
+                            except ValueError as err:
+                                parsed = []
+                                reply = {'error': {'code': 2, 'msg': f'Invalid request: {err}'}, 'id': request.get('id')}
+                            for name, symbol, interval_name, offset in parsed:
+                                streams.setdefault(name, self.binance.openTime(interval_name, offset))
+                        case 'UNSUBSCRIBE':
+                            for name in request['params']:
+                                streams.pop(name, None)
+                        case 'LIST_SUBSCRIPTIONS':
+                            reply['result'] = list(streams)
+                        case _:
+                            reply = {'error': {'code': 2, 'msg': 'Invalid request'}, 'id': request.get('id')}
+                connection.send(json.dumps(reply))
+        except ConnectionClosed:
+            pass
+        finally:
+            with self.lock:
+                self.connections.pop(connection, None)
+
+    def run(self):
+        updated = 0
+        while not self.stopped.wait(CLOSE_RESOLUTION):
+            update = time.monotonic() - updated >= UPDATE_INTERVAL
+            if update:
+                updated = time.monotonic()
+
+            with self.lock:
+                outgoing = [(connection, self.pending(streams, update))
+                            for connection, streams in self.connections.items()]
+            for connection, events in outgoing:
+                try:
+                    for event in events:
+                        connection.send(event)
+                except ConnectionClosed:
+                    pass
+
+    def pending(self, streams: dict, update: bool) -> list[str]:
+        """Events of the klines closed since the last call and, with `update`, of the open ones"""
+        events = []
+        for name, sent in streams.items():
+            symbol, interval_name, offset = parseStreamName(name)
+            current = self.binance.openTime(interval_name, offset)
+
+            for open_time in range(sent, current, INTERVALS_MS[interval_name]):
+                events.append(self.event(name, symbol, interval_name, open_time, closed=True))
+                self.counters['closed'] += 1
+            streams[name] = current
+            if update:
+                events.append(self.event(name, symbol, interval_name, current, closed=False))
+                self.counters['updates'] += 1
+        return events
+
+    def event(self, name: str, symbol: str, interval_name: str, open_time: int, closed: bool) -> str:
+        kline = self.binance.kline(symbol, open_time, INTERVALS_MS[interval_name])
+        return json.dumps({
+            'stream': name,
+            'data': {
+                'e': 'kline', 'E': self.binance.now(), 's': symbol,
+                'k': {
+                    't': kline[0], 'T': kline[6], 's': symbol, 'i': interval_name,
+                    'o': kline[1], 'c': kline[4], 'h': kline[2], 'l': kline[3],
+                    'v': kline[5], 'n': kline[8], 'x': closed, 'q': kline[7],
+                    'V': kline[9], 'Q': kline[10], 'B': kline[11],
+                },
+            },
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local Binance kline stream stand-in")
+    parser.add_argument("--port", type=int, default=8898)
+    parser.add_argument("--symbols", type=int, default=100)
+    args = parser.parse_args()
+
+    stand_in = FakeStream(FakeBinance(symbols=args.symbols), port=args.port)
+    print(f"Streaming {len(stand_in.binance.symbols)} symbols on {stand_in.url}")
+    try:
+        stand_in.start()
+        stand_in.stopped.wait()
+    except KeyboardInterrupt:
+        stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Local stand-in for the Telegram Bot API methods used by the bots (`getMe`
+and `sendMessage`).
+
+Flood limits are enforced like Telegram does: a chat accepts a message
+every `chat_interval` seconds and the bot at most `global_rate` messages
+per second, anything faster is answered with a 429 carrying `retry_after`.
+Messages over 4096 characters are rejected. Accepted messages are kept
+for inspection.
+
+    python -m benchmarks.fake_telegram --chat-interval 1
+    TELEGRAM_API_URL=http://127.0.0.1:8897/bot python manager.py start bot
+"""
+import json
+import math
+import time
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MESSAGE_LIMIT = 4096
+
+
+class FakeTelegram:
+    """
+    Bot API stand-in served from a background thread.
+
+    Parameters
+    ----------
+    chat_interval : float
+        Seconds a chat needs between two messages.
+    global_rate : float
+        Messages per second accepted across every chat.
+    latency : float
+        Seconds every response is delayed by.
+    """
+
+    def __init__(self, chat_interval: float = 1, global_rate: float = 30, latency: float = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.chat_interval = chat_interval
+        self.global_rate = global_rate
+        self.latency = latency
+
+        self.lock = threading.Lock()
+        self.last_message = {}
+        self.global_sent = []
+        self.messages = []
+        self.counters = {'requests': 0, '429': 0, 'too long': 0}
+
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeTelegram":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    #? methods
+
+    def getMe(self, params: dict) -> tuple[int, dict]:
+        return 200, {'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'Overseer', 'username': 'overseer_bot'}}
+
+    def sendMessage(self, params: dict) -> tuple[int, dict]:
+        chat_id, text = str(params['chat_id']), str(params['text'])
+        if len(text) > MESSAGE_LIMIT:
+            self.counters['too long'] += 1
+            return 400, {'ok': False, 'error_code': 400, 'description': 'Bad Request: message is too long'}
+
+        now = time.monotonic()
+        self.global_sent = [sent for sent in self.global_sent if now - sent < 1]
+        wait = self.last_message.get(chat_id, -math.inf) + self.chat_interval - now
+        if len(self.global_sent) >= self.global_rate:
+            wait = max(wait, self.global_sent[0] + 1 - now)
+        if wait > 0:
+            self.counters['429'] += 1
+            retry_after = math.ceil(wait)
+            return 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': retry_after},
+                         'description': f'Too Many Requests: retry after {retry_after}'}
+
+        self.last_message[chat_id] = now
+        self.global_sent.append(now)
+        self.messages.append({'chat_id': chat_id, 'text': text, 'time': now})
+        return 200, {'ok': True, 'result': {
+            'message_id': len(self.messages), 'date': int(time.time()), 'text': text,
+            'chat': {'id': int(chat_id), 'type': 'private'},
+        }}
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                method = self.path.rsplit('/', 1)[-1]
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params = json.loads(body or '{}')
+                else:
+                    params = {key: values[-1] for key, values in parse_qs(body).items()}
+
+                if stand_in.latency:
+                    time.sleep(stand_in.latency)
+                if method not in ('getMe', 'sendMessage'):
+                    return self.reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                with stand_in.lock:
+                    stand_in.counters['requests'] += 1
+                    status, reply = getattr(stand_in, method)(params)
+                self.reply(status, reply)
+
+            do_GET = do_POST
+
+            def reply(self, status: int, body: dict):
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local Telegram Bot API stand-in")
+    parser.add_argument("--port", type=int, default=8897)
+    parser.add_argument("--chat-interval", type=float, default=1, help="seconds between messages of a chat")
+    parser.add_argument("--global-rate", type=float, default=30, help="messages per second across chats")
+    args = parser.parse_args()
+
+    stand_in = FakeTelegram(chat_interval=args.chat_interval, global_rate=args.global_rate, port=args.port)
+    print(f"Serving the Bot API on {stand_in.url}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.stop()
+
+
+if __name__ == "__main__":
+    main()
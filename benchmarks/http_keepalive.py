@@ -0,0 +1,72 @@
+"""
+Per-request latency of one-off `requests.get` calls versus the pooled
+keep-alive session from `utils.http`, measured against a local stand-in server.
+The stand-in speaks plain HTTP, so the gap only covers the TCP handshake;
+against Binance the TLS handshake saved on every request comes on top of it.
+
+    python -m benchmarks.http_keepalive --requests 500
+"""
+import time
+import argparse
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+
+from utils.http import PooledSession
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    #? HTTP/1.1 keeps the connection open between requests
+    protocol_version = "HTTP/1.1"
+    #? headers and body go out in separate writes, Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+    body = b'[[1499040000000,"0.1","0.8","0.01","0.05","148976.1",1499644799999,"2434.1",308,"1756.8","28.4","0"]]'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(get, url: str, amount: int) -> list[float]:
+    latencies = []
+    for _ in range(amount):
+        started = time.perf_counter()
+        get(url).content
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<12} mean {statistics.mean(latencies) * 1000:7.3f} ms | "
+          f"p50 {statistics.median(latencies) * 1000:7.3f} ms | p95 {p95 * 1000:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-off and pooled HTTP requests")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/v3/klines"
+
+    try:
+        session = PooledSession()
+        session.get(url)  # warm up the pool
+        report("requests.get", measure(requests.get, url, args.requests))
+        report("pooled", measure(session.get, url, args.requests))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
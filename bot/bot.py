@@ -1,11 +1,15 @@
 from flask import Flask, request, jsonify
+from telegram import Bot
 from telegram.ext import Application
 
-from bot.config import CHAT_ID, CONTROL_BOT_TOKEN
+from bot.config import CHAT_ID, CONTROL_BOT_TOKEN, TELEGRAM_API_URL
+from bot.dispatcher import SwingDispatcher, SWING_KEYS, isValidSwing
 
 
 app = Flask(__name__)
-application = Application.builder().token(CONTROL_BOT_TOKEN).build()
+application = Application.builder().token(CONTROL_BOT_TOKEN).base_url(TELEGRAM_API_URL).build()
+#? the dispatcher runs its own event loop, it gets a bot of its own
+dispatcher = SwingDispatcher(Bot(CONTROL_BOT_TOKEN, base_url=TELEGRAM_API_URL), CHAT_ID)
 
 @app.before_request
 def check_origin():
@@ -22,19 +26,17 @@ async def debug():
     return jsonify({"status": "sent"}), 200
 
 @app.route("/swing-updates", methods=["POST"])
-async def send_new_swings():
-    swings = request.get_json()
+def send_new_swings():
+    swings = request.get_json(silent=True)
     if not swings:
         return jsonify({"error": "No data provided"}), 400
-    
-    await application.bot.send_message(
-        chat_id=CHAT_ID, text=f"New Swings Alert:\n{len(swings)}")
-    message = "Tradepair | Timeframe | Orientation\n"
-    message += '\n'.join([f"{swing['tradepair']} | {swing['timeframe']} | {swing['swing_type']}" for swing in swings])
-    await application.bot.send_message(
-        chat_id=CHAT_ID, text=message
-    )
-    return jsonify({"status": "sent"}), 200
+    #? rejected before anything is marked as received, the updater keeps the swings and retries them
+    if not isinstance(swings, list) or not all(map(isValidSwing, swings)):
+        return jsonify({"error": f"Every swing needs {', '.join(SWING_KEYS)}"}), 400
+
+    #? alerts are coalesced and paced by the dispatcher, the updater does not wait for telegram
+    queued = dispatcher.submit(swings)
+    return jsonify({"status": "queued", "swings": queued, "duplicates": len(swings) - queued}), 202
 
 
 @app.route("/newSwing", methods=["POST"])
@@ -53,4 +55,5 @@ async def send_new_swing():
     return jsonify({"status": "sent"}), 200
 
 def startBot():
+    dispatcher.start()
     app.run(host='127.0.0.1', port=7670, debug=True, use_reloader=False)
\ No newline at end of file
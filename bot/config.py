@@ -8,6 +8,10 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 CONTROL_BOT_TOKEN = os.getenv("CONTROL_BOT_TOKEN")
 ADMIN_ID = os.getenv("ADMIN_ID")
 UPDATER_SERVER_URL=os.getenv("UPDATER_SERVER_URL")
+#? bot api endpoint, the token is appended to it
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+#? seconds the control bot reuses updater responses for
+UPDATER_CACHE_TTL = float(os.getenv("UPDATER_CACHE_TTL", 10))
 
 if not TELEGRAM_BOT_TOKEN:
     raise AttributeError("Telegram bot token not found. Check .env file.")
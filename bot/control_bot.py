@@ -1,13 +1,16 @@
-import json
-import requests
 import asyncio
+
+import httpx
 from telegram import Update
 from telegram.ext import (
     ApplicationBuilder, ContextTypes, CommandHandler, TypeHandler, ApplicationHandlerStop
 )
 
-from bot.config import TELEGRAM_BOT_TOKEN, SPECIAL_USERS, UPDATER_SERVER_URL
+from bot.config import TELEGRAM_BOT_TOKEN, SPECIAL_USERS, UPDATER_SERVER_URL, TELEGRAM_API_URL
 from bot.config import logger
+from bot.updater_client import UpdaterClient
+
+updater = UpdaterClient(UPDATER_SERVER_URL)
 
 
 async def startHandle(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -23,20 +26,30 @@ async def authorizationHandle(update: Update, context: ContextTypes.DEFAULT_TYPE
         raise ApplicationHandlerStop
 
 async def getTradepairsHandle(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    response = requests.get("http://" + UPDATER_SERVER_URL + "/tradepairs")
-    tradepairs = json.loads(response.content)['tradepairs']
-    tracking = list(filter(lambda x: x['tracking'], tradepairs))
+    try:
+        summary = await updater.tradepairsSummary()
+    except httpx.HTTPError as err:
+        logger.error(f"Could not load the tradepairs summary: {err!r}")
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="Updater is unavailable, try again later")
+        return
 
     msg = """
   %d tradepairs loaded
   %d tracking
   %d untracking
-  """ % (len(tradepairs), len(tracking), len(tradepairs) - len(tracking))
+  """ % (summary['total'], summary['tracking'], summary['untracking'])
 
     await context.bot.send_message(chat_id=update.effective_chat.id, text=msg)
 
 
-application = ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).build()
+async def closeUpdaterClient(application):
+    await updater.close()
+
+
+application = (
+    ApplicationBuilder().token(TELEGRAM_BOT_TOKEN).base_url(TELEGRAM_API_URL)
+    .post_shutdown(closeUpdaterClient).build()
+)
 application.add_handler(TypeHandler(Update, authorizationHandle), -1)   
 application.add_handler(CommandHandler('start', startHandle))
 application.add_handler(CommandHandler('tradepairs', getTradepairsHandle))
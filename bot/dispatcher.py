@@ -0,0 +1,218 @@
+"""
+Delivery of swing alerts to Telegram.
+
+Swings posted by the updater are queued and coalesced for `COALESCE_WINDOW`
+seconds, then sent as few messages as fit under Telegram's length limit.
+Sends are paced to the flood limits of the chat and retried after the
+`retry_after` of a 429 or with a backoff on network errors. The updater
+retries undelivered posts, swings already received are dropped by id.
+"""
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+
+from telegram import Bot
+from telegram.error import RetryAfter, BadRequest, Forbidden, NetworkError
+
+from bot.config import logger
+
+#? characters per message accepted by telegram
+MESSAGE_LIMIT = 4096
+#? seconds swings are collected for once the first one is queued
+COALESCE_WINDOW = 2
+#? telegram takes about one message per second in a chat and 20 per minute in a group
+CHAT_SEND_INTERVAL = 1
+GROUP_SEND_INTERVAL = 3
+#? failed attempts before a message is dropped, flood waits included
+SEND_RETRIES = 8
+RETRY_MIN_DELAY = 1
+RETRY_MAX_DELAY = 60
+#? ids of the latest swings received, retried posts of the updater are deduplicated against them
+SEEN_SWINGS = 100000
+
+SWINGS_HEADER = "Tradepair | Timeframe | Orientation"
+#? keys an alert is formatted from, see `formatSwing()`
+SWING_KEYS = ('tradepair', 'timeframe', 'swing_type')
+
+
+def isValidSwing(swing) -> bool:
+    return isinstance(swing, dict) and all(isinstance(swing.get(key), str) for key in SWING_KEYS)
+
+def formatSwing(swing: dict) -> str:
+    return f"{swing['tradepair']} | {swing['timeframe']} | {swing['swing_type']}"
+
+def splitMessages(swings: list[dict], limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    Alert messages listing `swings`, every one under `limit` characters.
+
+    Each message carries the swing count, its part number and the column
+    header, swing lines are never split across messages.
+    """
+    lines = [formatSwing(swing)[:limit // 2] for swing in swings]
+    title = lambda part, parts: f"New Swings Alert: {len(lines)} ({part}/{parts})\n{SWINGS_HEADER}"
+    #? room for the longest possible title, the part numbers are only known once split
+    room = limit - len(title(len(lines), len(lines)))
+
+    chunks, chunk, size = [], [], 0
+    for line in lines:
+        if chunk and size + 1 + len(line) > room:
+            chunks.append(chunk)
+            chunk, size = [], 0
+        chunk.append(line)
+        size += 1 + len(line)
+    if chunk:
+        chunks.append(chunk)
+
+    return ['\n'.join([title(part, len(chunks)), *chunk]) for part, chunk in enumerate(chunks, start=1)]
+
+def sendInterval(chat_id: int | str) -> float:
+    #? group and channel ids are negative
+    return GROUP_SEND_INTERVAL if int(chat_id) < 0 else CHAT_SEND_INTERVAL
+
+def retryAfterSeconds(err: RetryAfter) -> float:
+    retry_after = err.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class SwingDispatcher:
+    """
+    Queue of swing alerts sent to one chat from a background event loop.
+
+    `submit()` is safe to call from any thread, e.g. the flask handlers.
+
+    Parameters
+    ----------
+    bot : telegram.Bot
+        Bot the messages are sent with, used only by the dispatcher loop.
+    chat_id : int | str
+        Chat receiving the alerts.
+    window : float
+        Seconds swings are coalesced for before being sent.
+    """
+
+    def __init__(self, bot: Bot, chat_id: int | str, window: float = COALESCE_WINDOW):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.window = window
+        self.interval = sendInterval(chat_id)
+
+        self.lock = threading.Lock()
+        self.pending = []
+        self.seen = OrderedDict()
+        self.stopped = False
+        self.sending = False
+        self.next_send = 0
+        self.counters = {'swings': 0, 'duplicates': 0, 'messages': 0, 'flood waits': 0, 'retries': 0, 'dropped': 0, 'invalid': 0}
+
+        self.loop = None
+        self.wakeup = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> "SwingDispatcher":
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def stop(self, timeout: float = None):
+        """Send the queued swings without waiting for the window and stop the loop"""
+        self.stopped = True
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+        self.thread.join(timeout)
+
+    def submit(self, swings: list[dict]) -> int:
+        """
+        Queue the swings not received before, returns how many were queued.
+        Malformed swings (see `isValidSwing()`) are skipped without being
+        marked as received, they would break the messages of a whole batch.
+        """
+        valid = [swing for swing in swings if isValidSwing(swing)]
+        if len(valid) < len(swings):
+            logger.error(f"Skipped {len(swings) - len(valid)} malformed swing alerts")
+        with self.lock:
+            fresh = [swing for swing in valid if self.firstSeen(swing.get('id'))]
+            self.pending.extend(fresh)
+            self.counters['swings'] += len(fresh)
+            self.counters['duplicates'] += len(valid) - len(fresh)
+            self.counters['invalid'] += len(swings) - len(valid)
+        if fresh:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        return len(fresh)
+
+    def firstSeen(self, swing_id: int | None) -> bool:
+        if swing_id is None:
+            return True
+        if swing_id in self.seen:
+            return False
+        self.seen[swing_id] = None
+        if len(self.seen) > SEEN_SWINGS:
+            self.seen.popitem(last=False)
+        return True
+
+    def idle(self) -> bool:
+        """Whether every submitted swing was sent (or dropped)"""
+        with self.lock:
+            return not self.pending and not self.sending
+
+    #? event loop
+
+    def run(self):
+        asyncio.run(self.dispatch())
+
+    async def dispatch(self):
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.ready.set()
+        try:
+            while not (self.stopped and not self.pending):
+                await self.wakeup.wait()
+                if not self.stopped:
+                    #? swings of the same update arrive in several posts, they share the messages
+                    await asyncio.sleep(self.window)
+
+                with self.lock:
+                    swings, self.pending = self.pending, []
+                    self.sending = True
+                    self.wakeup.clear()
+                try:
+                    for text in splitMessages(swings):
+                        await self.send(text)
+                except Exception as err:
+                    #? the loop outlives any batch, a dead loop would silently queue swings forever
+                    self.counters['dropped'] += 1
+                    logger.exception(f"Dropped a batch of {len(swings)} swing alerts: {err!r}")
+                finally:
+                    self.sending = False
+        finally:
+            await self.bot.shutdown()
+
+    async def send(self, text: str) -> bool:
+        for attempt in range(SEND_RETRIES):
+            await asyncio.sleep(max(self.next_send - time.monotonic(), 0))
+            self.next_send = time.monotonic() + self.interval
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text)
+                self.counters['messages'] += 1
+                return True
+            except RetryAfter as err:
+                delay = retryAfterSeconds(err)
+                self.counters['flood waits'] += 1
+                logger.warning(f"Telegram flood control, retrying in {delay} seconds")
+                self.next_send = time.monotonic() + delay
+            except (BadRequest, Forbidden) as err:
+                logger.error(f"Telegram rejected a swing alert: {err}")
+                break
+            except NetworkError as err:
+                delay = min(RETRY_MIN_DELAY * 2 ** attempt, RETRY_MAX_DELAY) * random.uniform(0.5, 1)
+                self.counters['retries'] += 1
+                logger.warning(f"Could not send a swing alert ({err}), retrying in {delay:.1f} seconds")
+                self.next_send = time.monotonic() + delay
+            except Exception as err:
+                logger.exception(f"Unexpected error sending a swing alert: {err!r}")
+                break
+
+        self.counters['dropped'] += 1
+        logger.error(f"Dropped a swing alert of {text.count(chr(10)) - 1} swings")
+        return False
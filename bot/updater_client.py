@@ -0,0 +1,91 @@
+"""
+Async client of the updater api for the bot handlers, they run on the
+event loop of the telegram application and must never block it.
+"""
+import time
+import asyncio
+
+import httpx
+
+from bot.config import UPDATER_CACHE_TTL
+from utils.http import HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+
+class UpdaterClient:
+    """
+    Keep-alive connection pool to the updater with GET responses cached for `ttl` seconds.
+
+    Concurrent requests of the same resource share one round trip. The
+    httpx client is created on first use, inside the event loop awaiting it.
+
+    Parameters
+    ----------
+    url : str
+        Updater address, `host:port` or a full url.
+    ttl : float
+        Seconds a response is served from the cache.
+    """
+
+    def __init__(self, url: str, ttl: float = UPDATER_CACHE_TTL):
+        self.base_url = url if "://" in url else "http://" + url
+        self.ttl = ttl
+        self.client = None
+        #? (path, params) -> (expiry, decoded response)
+        self.cache = {}
+        self.inflight = {}
+
+    async def get(self, path: str, **params) -> dict:
+        """Decoded JSON response of a GET, raises `httpx.HTTPError` when the updater fails"""
+        key = (path, tuple(sorted(params.items())))
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        if key in self.inflight:
+            inflight = self.inflight[key]
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                #? the request being waited for was cancelled, not this one: make it again
+                if inflight.cancelled():
+                    return await self.get(path, **params)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            response = await self.httpClient().get(path, params=params)
+            response.raise_for_status()
+            value = response.json()
+            self.cache[key] = (time.monotonic() + self.ttl, value)
+            future.set_result(value)
+            return value
+        except Exception as err:
+            future.set_exception(err)
+            #? marks the exception as retrieved when no other request was waiting for it
+            future.exception()
+            raise
+        finally:
+            #? cancelled (a BaseException), the waiting requests must not hang on the future
+            if not future.done():
+                future.cancel()
+            del self.inflight[key]
+
+    async def tradepairsSummary(self) -> dict:
+        return await self.get('/tradepairs/summary')
+
+    def invalidate(self):
+        self.cache.clear()
+
+    def httpClient(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+                timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            )
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
@@ -1,8 +1,8 @@
-from updater.server import startServer, debug
-from bot.server import startBots
 import sys
 import argparse
 
+#? subcommands import their modules when they run, so `--help` and the crud
+#? commands start without loading flask, the bots or the binance client
 
 
 def parseArgs():
@@ -11,7 +11,7 @@ def parseArgs():
   subparsers = parser.add_subparsers(dest="command")
 
   start = subparsers.add_parser("start", help="start specified server")
-  start.add_argument("server_name", help='server name to start', choices=['updater', 'bot'])
+  start.add_argument("server_name", help='server name to start', choices=['updater', 'stream', 'worker', 'bot'])
 
   parse = subparsers.add_parser("parse", help='parse fresh candles list from binance')
   parse.add_argument("table", choices=["candles", "tradepairs"])
@@ -23,6 +23,14 @@ def parseArgs():
 
   show = subparsers.add_parser("show", help="output stored tradepairs")
   show.add_argument("-f", "--filter", nargs="?", const="none-filter", help="filter tradepairs", choices=['tracking', 'untracking', 'none-filter'])
+
+  backfill = subparsers.add_parser("backfill", help="load the full candle history of tradepairs")
+  backfill.add_argument("tradepairs", help="tradepairs to backfill, all tracked tradepairs by default", nargs='*')
+  backfill.add_argument("-w", "--workers", type=int, help="tradepairs backfilled in parallel")
+  backfill.add_argument("--restart", action="store_true", help="ignore saved checkpoints and start over")
+
+  db = subparsers.add_parser("db", help="administer the updater database")
+  db.add_argument("action", choices=["create"], help="create: create the database and its missing tables")
   
   args = parser.parse_args()
 
@@ -35,13 +43,54 @@ def main():
   match args.command:
     case 'start':
       if args.server_name == 'bot':
+        from bot.server import startBots
         startBots()
+      elif args.server_name == 'stream':
+        from updater.server import startStream
+        startStream()
+      elif args.server_name == 'worker':
+        from updater.worker import startWorker
+        startWorker()
+      else:
+        from updater.server import startServer
+        startServer()
+    case 'parse':
+      from updater import ingest
+      if args.table == 'candles':
+        added_candles = ingest.parseNewCandles()
+        print(f"Added {len(added_candles)} candles")
+      else:
+        added_tradepairs, delisted_tradepairs = ingest.parseNewTradepairs()
+        print(f"Added {len(added_tradepairs)} tradepairs, {len(delisted_tradepairs)} delisted")
+    case 'update':
+      from updater.db import crud
+      tradepairs = [name.upper() for name in args.tradepairs]
+      updated_tradepairs = crud.switchTradepairsTrackingStatus(args.tracking_status == 'track', tradepairs)
+      for tradepair in updated_tradepairs:
+        print(f"{tradepair['name']}: {'tracking' if tradepair['tracking'] else 'not tracking'}")
+      missing = sorted(set(tradepairs) - {tradepair['name'] for tradepair in updated_tradepairs})
+      if missing:
+        print(f"Unknown tradepairs: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    case 'show':
+      from updater.db import crud
+      tracking = {'tracking': True, 'untracking': False}.get(args.filter)
+      for tradepair in crud.selectTradepairs(tracking):
+        flags = [flag for flag in ('tracking', 'delisted') if tradepair[flag]]
+        print(f"{tradepair['name']:<20}{', '.join(flags)}")
+    case 'backfill':
+      from updater.backfill import backfill
+      options = {'workers': args.workers} if args.workers else {}
+      backfill(args.tradepairs or None, restart=args.restart, **options)
+    case 'db':
+      from updater.db.engine import createDatabase
+      if createDatabase():
+        print("Database created")
       else:
-        #startServer()
-        debug()
+        print("Database already exists, missing tables created")
     case _:
       pass
   
   
 if __name__ == '__main__':
-  main()
\ No newline at end of file
+  main()
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from benchmarks.fake_binance import FakeBinance, INTERVALS_MS
+
+#? bot.config refuses to load without these, the tests talk to local stand-ins only
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:test")
+os.environ.setdefault("CONTROL_BOT_TOKEN", "2:test")
+os.environ.setdefault("ADMIN_ID", "42")
+os.environ.setdefault("UPDATER_SERVER_URL", "127.0.0.1:0")
+os.environ.setdefault("BOT_SERVER_URL", "127.0.0.1:0")
+os.environ.setdefault("TIMEFRAMES", "1d,1w")
+#? the database tests drop every table of it, point it at a scratch database
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.makedirs("logs", exist_ok=True)
+
+
+@pytest.fixture
+def database():
+    """Empty updater database, the tests using it are skipped without `TEST_DATABASE_URL`"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from updater.db import crud
+    from updater.db.models import Base
+
+    Base.metadata.drop_all(crud.getEngine())
+    Base.metadata.create_all(crud.getEngine())
+    crud.candle_cache.invalidate()
+    yield crud
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Binance stand-in the updater talks to, its clock 30 days behind"""
+    from updater.api import binance
+
+    stand_in = FakeBinance(symbols=3, history=200, lag=30 * INTERVALS_MS['1d']).start()
+    monkeypatch.setattr(binance, 'API_BASE_URL', stand_in.url)
+    yield stand_in
+    stand_in.stop()
+
+@pytest.fixture
+def tradepairs(database, stand_in):
+    """Tradepairs of the stand-in and the configured timeframes, stored in the test database"""
+    from updater.api import binance
+    from updater.config import TIMEFRAMES
+
+    database.addTimeframes({name: binance.INTERVALS[name] for name in TIMEFRAMES})
+    tradepairs = binance.getTradepairs()
+    database.addTradepairs(tradepairs)
+    return tradepairs
@@ -0,0 +1,43 @@
+"""`crud.candle_cache` kept consistent with candles written by other processes"""
+
+
+def openDays(columns: dict) -> list:
+    return columns['datetime_open'].astype('datetime64[D]').tolist()
+
+def storeElsewhere(crud, candles):
+    """Insert candles the way another process would, without going through this process' cache"""
+    from sqlalchemy.dialects.postgresql import insert
+    from updater.db.models import Candle
+
+    with crud.getSession() as session:
+        session.execute(insert(Candle), candles.toDicts())
+
+
+def test_cache_misses_when_another_process_wrote_newer_candles(database, stand_in, tradepairs):
+    from updater.api import binance
+
+    tradepair_name = tradepairs[0]
+    candles = binance.getCandles([tradepair_name], interval='1d', limit=15)
+    database.addCandles(candles[:10])
+    database.selectCandleSeries(tradepair_name, '1d')
+    storeElsewhere(database, candles[10:14])
+
+    latest = lambda: database.selectLatestCandleOpens('1d', [tradepair_name])[tradepair_name]
+    since = candles[9:10].datetime_open[0]
+    columns = database.selectCandleSeries(tradepair_name, '1d', since=since.item(), lookback=2, latest=latest())
+    assert openDays(columns) == candles[8:14].datetime_open.astype('datetime64[D]').tolist()
+
+def test_cache_never_serves_a_gap(database, stand_in, tradepairs):
+    from updater.api import binance
+
+    tradepair_name = tradepairs[0]
+    candles = binance.getCandles([tradepair_name], interval='1d', limit=15)
+    database.addCandles(candles[:10])
+    database.selectCandleSeries(tradepair_name, '1d')
+    storeElsewhere(database, candles[10:14])
+    #? this process stores the next candle, past the ones it never saw
+    database.addCandles(candles[14:15])
+
+    since = candles[13:14].datetime_open[0]
+    columns = database.selectCandleSeries(tradepair_name, '1d', since=since.item(), lookback=4)
+    assert openDays(columns) == candles[10:15].datetime_open.astype('datetime64[D]').tolist()
@@ -0,0 +1,125 @@
+"""`bot.dispatcher.SwingDispatcher` against the local Bot API stand-in"""
+import time
+
+import pytest
+from telegram import Bot
+
+from benchmarks.fake_telegram import FakeTelegram
+from bot import dispatcher
+from bot.dispatcher import SwingDispatcher, SWINGS_HEADER, formatSwing
+
+WINDOW = 0.05
+TIMEOUT = 10
+
+
+def swing(i: int) -> dict:
+    return {'id': i, 'tradepair': f"SYM{i:04d}USDT", 'timeframe': '1h', 'swing_type': 'high' if i % 2 else 'low'}
+
+def delivered(stand_in: FakeTelegram) -> list[str]:
+    return [line for message in stand_in.messages for line in message['text'].split('\n')
+            if ' | ' in line and line != SWINGS_HEADER]
+
+def waitIdle(swing_dispatcher: SwingDispatcher):
+    deadline = time.monotonic() + TIMEOUT
+    #? submitted swings are only picked up once the loop wakes up
+    time.sleep(WINDOW * 2)
+    while not swing_dispatcher.idle():
+        assert time.monotonic() < deadline, "dispatcher did not send the queued swings"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def stand_in():
+    stand_in = FakeTelegram(chat_interval=0).start()
+    yield stand_in
+    stand_in.stop()
+
+@pytest.fixture
+def make_dispatcher(stand_in):
+    started = []
+
+    def make(bot: Bot = None) -> SwingDispatcher:
+        swing_dispatcher = SwingDispatcher(bot or Bot("1:test", base_url=stand_in.url), 42, window=WINDOW)
+        swing_dispatcher.interval = 0
+        started.append(swing_dispatcher.start())
+        return swing_dispatcher
+
+    yield make
+    for swing_dispatcher in started:
+        swing_dispatcher.stop(TIMEOUT)
+
+
+def test_delivers_every_swing_once_in_coalesced_messages(stand_in, make_dispatcher):
+    swing_dispatcher = make_dispatcher()
+    swings = [swing(i) for i in range(600)]
+    for start in range(0, len(swings), 100):
+        swing_dispatcher.submit(swings[start:start + 100])
+    waitIdle(swing_dispatcher)
+
+    assert sorted(delivered(stand_in)) == sorted(map(formatSwing, swings))
+    assert all(len(message['text']) <= dispatcher.MESSAGE_LIMIT for message in stand_in.messages)
+    #? six posts within the window share the messages
+    assert len(stand_in.messages) < 6
+
+def test_drops_swings_received_before(stand_in, make_dispatcher):
+    swing_dispatcher = make_dispatcher()
+    assert swing_dispatcher.submit([swing(1), swing(2)]) == 2
+    assert swing_dispatcher.submit([swing(2), swing(3)]) == 1
+    waitIdle(swing_dispatcher)
+
+    assert sorted(delivered(stand_in)) == sorted(map(formatSwing, [swing(1), swing(2), swing(3)]))
+    assert swing_dispatcher.counters['duplicates'] == 1
+
+def test_waits_out_flood_control(stand_in, make_dispatcher):
+    stand_in.chat_interval = 0.5
+    swing_dispatcher = make_dispatcher()
+    swing_dispatcher.submit([swing(1)])
+    waitIdle(swing_dispatcher)
+    swing_dispatcher.submit([swing(2)])
+    waitIdle(swing_dispatcher)
+
+    assert delivered(stand_in) == [formatSwing(swing(1)), formatSwing(swing(2))]
+    assert swing_dispatcher.counters['flood waits'] >= 1
+    assert swing_dispatcher.counters['dropped'] == 0
+
+def test_skips_malformed_swings_only(stand_in, make_dispatcher):
+    swing_dispatcher = make_dispatcher()
+    assert swing_dispatcher.submit([{'id': 1, 'tradepair': 'BTCUSDT'}]) == 0
+    assert swing_dispatcher.submit([swing(2)]) == 1
+    waitIdle(swing_dispatcher)
+
+    assert delivered(stand_in) == [formatSwing(swing(2))]
+    assert swing_dispatcher.counters['invalid'] == 1
+    assert swing_dispatcher.counters['dropped'] == 0
+    #? the malformed swing was not marked as received, a corrected retry goes through
+    assert swing_dispatcher.submit([swing(1)]) == 1
+    assert swing_dispatcher.submit([swing(2)]) == 0
+
+def test_route_rejects_malformed_swings_before_marking_them():
+    from bot import bot
+
+    client = bot.app.test_client()
+    response = client.post("/swing-updates", json=[swing(1), {'id': 2, 'tradepair': 'BTCUSDT'}])
+    assert response.status_code == 400
+    assert not bot.dispatcher.seen
+    assert client.post("/swing-updates", json={'id': 1}).status_code == 400
+
+def test_keeps_running_after_an_unexpected_send_error(stand_in, make_dispatcher):
+
+    class FlakyBot(Bot):
+        failures = 1
+
+        async def send_message(self, *args, **kwargs):
+            if FlakyBot.failures:
+                FlakyBot.failures -= 1
+                raise RuntimeError("unexpected")
+            return await super().send_message(*args, **kwargs)
+
+    swing_dispatcher = make_dispatcher(FlakyBot("1:test", base_url=stand_in.url))
+    swing_dispatcher.submit([swing(1)])
+    waitIdle(swing_dispatcher)
+    swing_dispatcher.submit([swing(2)])
+    waitIdle(swing_dispatcher)
+
+    assert delivered(stand_in) == [formatSwing(swing(2))]
+    assert swing_dispatcher.counters['dropped'] == 1
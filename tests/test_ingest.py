@@ -0,0 +1,28 @@
+"""Candle fetching of the updates against the local Binance stand-in"""
+from datetime import timedelta
+
+
+def test_stale_tradepair_does_not_raise_the_others_limits(database, stand_in, tradepairs):
+    import numpy as np
+    from updater import ingest
+    from updater.api import binance
+
+    candles = binance.getCandles(tradepairs, interval='1d', limit=100)
+    stale = tradepairs[0]
+    cutoff = candles.datetime_open.max() - np.timedelta64(50, 'D')
+    database.addCandles(candles[(candles.tradepair_name != stale) | (candles.datetime_open <= cutoff)])
+
+    missed = ingest.missedCandles('1d', tradepairs)
+    assert missed[stale] == missed[tradepairs[1]] + 50
+    assert len({missed[name] for name in tradepairs[1:]}) == 1
+
+def test_catches_up_every_missed_candle(database, stand_in, tradepairs):
+    from updater import backfill, ingest
+
+    backfill.backfill()
+    before = database.selectLatestCandleOpens('1d', tradepairs)
+    stand_in.advance(20 * 86_400_000)
+    ingest.parseNewCandles(['1d'])
+
+    after = database.selectLatestCandleOpens('1d', tradepairs)
+    assert all(after[name] - before[name] == timedelta(days=20) for name in tradepairs)
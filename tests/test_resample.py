@@ -0,0 +1,67 @@
+"""`updater.resample` of base candles into higher timeframes"""
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+DAY_MS = 86_400_000
+
+
+@pytest.fixture
+def london(monkeypatch):
+    """Local time of the process in Europe/London, which moved to BST on 2024-03-31"""
+    monkeypatch.setenv("TZ", "Europe/London")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def dailyCandles(start_ms: int, count: int):
+    from updater.candles import CandleBatch, localDatetimes
+
+    opens = start_ms + DAY_MS * np.arange(count, dtype=np.int64)
+    prices = np.arange(count, dtype=float) + 1
+    return CandleBatch.fromSeries('BTCUSDT', '1d', {
+        'datetime_open': localDatetimes(opens),
+        'datetime_close': localDatetimes(opens + DAY_MS - 1),
+        'open': prices, 'high': prices + 0.5, 'low': prices - 0.5, 'close': prices,
+    })
+
+def weekStart(date: str) -> int:
+    """Unix milliseconds of the open of the binance week holding `date` (UTC)"""
+    from updater.resample import bucketStarts
+    epoch = np.datetime64(date, 's').astype(np.int64)
+    return int(bucketStarts(np.array([epoch], dtype=float), timedelta(weeks=1))[0]) * 1000
+
+
+def test_weekly_candle_aggregates_its_days():
+    from updater.resample import resampleCandles
+
+    start = weekStart('2024-01-10')
+    weekly = resampleCandles(dailyCandles(start, 7), '1w')
+
+    assert len(weekly) == 1
+    assert (weekly.open[0], weekly.high[0], weekly.low[0], weekly.close[0]) == (1, 7.5, 0.5, 7)
+
+def test_incomplete_weeks_are_not_built():
+    from updater.resample import resampleCandles
+
+    start = weekStart('2024-01-10')
+    assert len(resampleCandles(dailyCandles(start, 6), '1w')) == 0
+    assert len(resampleCandles(dailyCandles(start + DAY_MS, 7), '1w')) == 0
+    assert len(resampleCandles(dailyCandles(start + DAY_MS, 6), '1w', from_listing=True)) == 1
+
+def test_close_of_a_week_crossing_a_dst_change(london):
+    from updater.candles import localDatetimes
+    from updater.resample import resampleCandles
+
+    start = weekStart('2024-03-27')
+    weekly = resampleCandles(dailyCandles(start, 7), '1w')
+
+    assert len(weekly) == 1
+    assert weekly.datetime_close[0] == localDatetimes(np.array([start + 7 * DAY_MS - 1]))[0]
+    #? the week opens at midnight UTC+1, 23:00 GMT, and closes a millisecond before midnight UTC+1, BST by then
+    assert weekly.datetime_open[0] == np.datetime64('2024-03-24T23:00')
+    assert weekly.datetime_close[0] == np.datetime64('2024-03-31T23:59:59.999')
@@ -0,0 +1,17 @@
+"""Routes of the updater api against the local Binance stand-in"""
+
+
+def test_tradepairs_update_returns_added_and_delisted(database, stand_in):
+    from updater import server
+
+    client = server.app.test_client()
+    response = client.post('/tradepairs/update')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [tradepair['name'] for tradepair in body['added_tradepairs']] == [f"SYM{i:04d}USDT" for i in range(3)]
+    assert body['delisted_tradepairs'] == []
+
+    stand_in.symbols = stand_in.symbols[1:]
+    body = client.post('/tradepairs/update').get_json()
+    assert body['added_tradepairs'] == []
+    assert [tradepair['name'] for tradepair in body['delisted_tradepairs']] == ['SYM0000USDT']
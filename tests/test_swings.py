@@ -0,0 +1,47 @@
+"""Swing detection of the updates and backfills against the local Binance stand-in"""
+from benchmarks.fake_binance import INTERVALS_MS
+
+
+def countSwings(crud) -> int:
+    from sqlalchemy import select, func
+    from updater.db.models import Swing
+    return crud.selectRows(select(func.count().label('count')).select_from(Swing))[0]['count']
+
+
+def test_backfilled_history_is_not_alerted(database, stand_in, tradepairs):
+    from updater import backfill, server
+
+    backfill.backfill()
+    history = countSwings(database)
+    assert history > 0
+    assert database.countSwingNotifications() == 0
+
+    server.update()
+    assert countSwings(database) == history
+    assert database.countSwingNotifications() == 0
+
+def test_backfill_behind_the_watermark_is_not_alerted(database, stand_in, tradepairs):
+    from updater import backfill, server
+
+    server.update()
+    notified = database.countSwingNotifications()
+    backfill.backfill()
+    assert countSwings(database) > 0
+    assert database.countSwingNotifications() == notified
+
+def test_first_scan_of_a_series_is_not_alerted(database, stand_in, tradepairs):
+    from updater import server
+
+    server.update()
+    assert database.countSwingNotifications() == 0
+    for tradepair_name in tradepairs:
+        assert database.selectSwingWatermark(tradepair_name, '1d') is not None
+
+def test_new_swings_are_alerted(database, stand_in, tradepairs):
+    from updater import backfill, server
+
+    backfill.backfill()
+    #? enough new days for the tradepairs to form swings
+    stand_in.advance(20 * INTERVALS_MS['1d'])
+    server.update()
+    assert database.countSwingNotifications() > 0
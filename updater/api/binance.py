@@ -1,8 +1,14 @@
-import requests
-import time
 import json
+import time
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from updater.api.limiter import WeightLimiter
+from updater import metrics
+from updater.candles import CandleBatch
+from updater.config import BINANCE_API_URL, BINANCE_WORKERS, BINANCE_WEIGHT_LIMIT
+from utils.http import getHttpSession
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -43,12 +49,40 @@ logger.addHandler(file_handler)
 '''
 
 
-API_BASE_URL = "https://data-api.binance.vision/api/v3"
+API_BASE_URL = BINANCE_API_URL
 EXCHANGE_BASE_ENDPOINT = "exchangeInfo"
 PING_ENDPOINT = "ping"
 CANDLES_ENDPOINT = "klines"
 
-
+#? kline intervals with a fixed length, calendar months (1M) are not supported
+INTERVALS = {
+    '1m': timedelta(minutes=1),
+    '3m': timedelta(minutes=3),
+    '5m': timedelta(minutes=5),
+    '15m': timedelta(minutes=15),
+    '30m': timedelta(minutes=30),
+    '1h': timedelta(hours=1),
+    '2h': timedelta(hours=2),
+    '4h': timedelta(hours=4),
+    '6h': timedelta(hours=6),
+    '8h': timedelta(hours=8),
+    '12h': timedelta(hours=12),
+    '1d': timedelta(days=1),
+    '3d': timedelta(days=3),
+    '1w': timedelta(weeks=1),
+}
+#? `timeZone` request parameter, intervals start at midnight of UTC+1
+TIMEZONE_OFFSET = 1
+#? klines requested per tradepair on every update
+CANDLES_LIMIT = 5
+MAX_CANDLES_LIMIT = 1000
+
+#? request weights, see https://developers.binance.com/docs/binance-spot-api-docs/rest-api
+EXCHANGE_INFO_WEIGHT = 20
+CANDLES_WEIGHT = 2
+
+limiter = WeightLimiter(capacity=BINANCE_WEIGHT_LIMIT)
+session = getHttpSession(API_BASE_URL)
 
 
 class ApiOverflowError(Exception):
@@ -61,7 +95,11 @@ class ApiOverflowError(Exception):
 
 def getTradepairs() -> list[str]:
     try:
-        response = requests.get('/'.join([API_BASE_URL, EXCHANGE_BASE_ENDPOINT]))
+        limiter.acquire(EXCHANGE_INFO_WEIGHT)
+        with metrics.binance_request_seconds.labels(EXCHANGE_BASE_ENDPOINT).time():
+            response = session.get('/'.join([API_BASE_URL, EXCHANGE_BASE_ENDPOINT]))
+        metrics.binance_weight_spent.labels(EXCHANGE_BASE_ENDPOINT).inc(EXCHANGE_INFO_WEIGHT)
+        limiter.update(response.headers)
         symbols = json.loads(response.content)["symbols"]
         assets = sorted(set(filter(lambda x: str(x).endswith(
             "USDT"), list(map(lambda x: x["symbol"], symbols)))))
@@ -69,68 +107,65 @@ def getTradepairs() -> list[str]:
     except:
         raise ConnectionError("Network connection error, try again later")
 
-def parseCandleFromResponse(array, symbol):
-    candle = dict()
-    candle["timeframe_name"] = '1w'
-    candle["datetime_open"] = datetime.fromtimestamp(float(array[0])/1000)
-    candle["datetime_close"] = datetime.fromtimestamp(float(array[6])/1000)
-    candle["open"] = float(array[1])
-    candle["high"] = float(array[2])
-    candle["low"] = float(array[3])
-    candle["close"] = float(array[4])
-    candle["tradepair_name"] = symbol
-    return candle
-
-def requestTradepairCandles(symbol: str, limit: int = 5, interval: str = '1w') -> list[dict]:
-    response = requests.get('/'.join([API_BASE_URL, CANDLES_ENDPOINT]),
-                            params={'timeZone': 1, 'interval': interval ,
-                                    'limit': limit, 'symbol': symbol}
-                            )
+def parseCandlesFromResponse(klines: list[list], symbol: str, interval: str = '1w') -> CandleBatch:
+    return CandleBatch.fromKlines(klines, symbol, interval)
+
+def requestTradepairCandles(symbol: str, limit: int = CANDLES_LIMIT, interval: str = '1w',
+                            start_time: datetime = None) -> CandleBatch:
+    params = {'timeZone': TIMEZONE_OFFSET, 'interval': interval, 'limit': limit, 'symbol': symbol}
+    if start_time:
+        params['startTime'] = int(start_time.timestamp() * 1000)
+
+    limiter.acquire(CANDLES_WEIGHT)
+    with metrics.binance_request_seconds.labels(CANDLES_ENDPOINT).time():
+        response = session.get('/'.join([API_BASE_URL, CANDLES_ENDPOINT]), params=params)
+    metrics.binance_weight_spent.labels(CANDLES_ENDPOINT).inc(CANDLES_WEIGHT)
+    limiter.update(response.headers)
     match response.status_code:
         case 200:
             klines = json.loads(response.content)
-            return [parseCandleFromResponse(kline, symbol) for kline in klines]
-        case 429:
-            # ? limit
-            raise ApiOverflowError(timeout=response.headers["Retry-After"])
-        case 418:
-            # ? autoban
-            raise ApiOverflowError(timeout=response.headers["Retry-After"])
+            #? the last kline is still open, its prices are not final yet
+            now = time.time() * 1000
+            return parseCandlesFromResponse([kline for kline in klines if kline[6] < now], symbol, interval)
+        case 429 | 418:
+            # ? 429 - limit, 418 - autoban
+            metrics.binance_rate_limited.labels(response.status_code).inc()
+            timeout = int(response.headers.get("Retry-After", 60))
+            limiter.block(timeout)
+            raise ApiOverflowError(timeout=timeout)
         case _:
             raise BrokenPipeError(response)
 
 
-def getCandles(tradepairs: list[str])->list[dict]:
-    candles = list()
-
-    for tradepair_name in tradepairs:
-        logger.info("Loading cabdles for %s"%tradepair_name)
-        loaded = False
-        while loaded == False:
-            try:
-                tradepair_candles = requestTradepairCandles(symbol=tradepair_name)
-                candles += tradepair_candles
-                loaded = True
-            except ApiOverflowError as err:
-                logger.warning("Api overflown, waiting %d seconds"%err.timeout)
-                #? make it with logger
-                time.sleep(err.timeout)
-            except Exception as e:
-                logger.critical(e)
-                raise RuntimeError(e)
-                
-    return candles
-
-def getTradepairCandles(symbol: str):
-    loaded = False
-    while loaded == False:
+def getCandles(tradepairs: list[str], interval: str = '1w', limit: int = CANDLES_LIMIT,
+               workers: int = BINANCE_WORKERS) -> CandleBatch:
+    """
+    Fetch candles for every tradepair using a pool of `workers` threads.
+
+    All workers share the module `limiter`, so the pool never spends more
+    weight than Binance allows. Candles are returned in the order of `tradepairs`.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(getTradepairCandles, tradepair_name, interval, limit)
+                   for tradepair_name in tradepairs]
+        try:
+            batches = [future.result() for future in futures]
+        except:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return CandleBatch.concat(batches)
+
+def getTradepairCandles(symbol: str, interval: str = '1w', limit: int = CANDLES_LIMIT,
+                        start_time: datetime = None) -> CandleBatch:
+    logger.info("Loading %s candles for %s"%(interval, symbol))
+    while True:
         try:
-            candles = requestTradepairCandles(symbol=symbol)
-            loaded=True
-            return candles
+            return requestTradepairCandles(symbol=symbol, limit=limit, interval=interval, start_time=start_time)
         except ApiOverflowError as err:
+            #? the limiter is blocked for err.timeout, next attempt waits for it
             logger.warning("Api overflown, waiting %d seconds"%err.timeout)
-            time.sleep(err.timeout)
         except Exception as e:
             logger.critical(e)
-            raise RuntimeError(e)
\ No newline at end of file
+            raise RuntimeError(e)
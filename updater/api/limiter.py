@@ -0,0 +1,84 @@
+import re
+import time
+import threading
+import logging
+
+from updater import metrics
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_HEADER_PATTERN = re.compile(r"^x-mbx-used-weight-(\d+)([smhd])$", re.IGNORECASE)
+INTERVAL_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class WeightLimiter:
+    """
+    Token bucket shared by every thread talking to the Binance API.
+
+    Tokens are request weight units refilled at `capacity / interval` per second.
+    The bucket is reconciled with the `X-MBX-USED-WEIGHT-*` response headers, so
+    workers slow down while the server side counter approaches the limit
+    instead of waiting for a 429.
+
+    Parameters
+    ----------
+    capacity : int
+        Weight allowed by Binance per `interval`.
+    interval : int
+        Length of the weight window in seconds.
+    headroom : float
+        Share of `capacity` that is never spent, left for other clients of the same IP.
+    """
+
+    def __init__(self, capacity: int = 6000, interval: int = 60, headroom: float = 0.1):
+        self.interval = interval
+        self.ceiling = capacity * (1 - headroom)
+        self.rate = capacity / interval
+        self.tokens = self.ceiling
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.ceiling, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, weight: int = 1):
+        """Block until `weight` tokens can be spent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= weight:
+                        self.tokens -= weight
+                        return
+                    wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def block(self, timeout: float):
+        """Stop every worker for `timeout` seconds, e.g. after a 429 with Retry-After"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + timeout)
+
+    def update(self, headers):
+        """Reconcile the bucket with the used weight reported by Binance"""
+        for name, value in headers.items():
+            match = WEIGHT_HEADER_PATTERN.match(name)
+            if not match:
+                continue
+            window = int(match.group(1)) * INTERVAL_SECONDS[match.group(2).lower()]
+            if window != self.interval:
+                continue
+
+            used = int(value)
+            metrics.binance_used_weight.set(used)
+            if used >= self.ceiling:
+                #? binance counts weight in fixed windows, nothing refills before the next one starts
+                timeout = self.interval - time.time() % self.interval
+                logger.warning(f"Used weight {used} reached the limit, pausing for {timeout:.1f} seconds")
+                self.block(timeout)
+            with self.lock:
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, max(self.ceiling - used, 0))
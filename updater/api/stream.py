@@ -0,0 +1,185 @@
+import json
+import time
+import random
+import logging
+import threading
+from typing import Callable
+
+from websockets.sync.client import connect
+from websockets.exceptions import WebSocketException
+
+from updater.api import binance
+from updater.candles import CandleBatch
+from updater.config import BINANCE_STREAM_URL
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.DEBUG)
+
+formatter = logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(formatter)
+
+file_handler = logging.FileHandler("logs/stream.log")
+file_handler.setLevel(logging.DEBUG)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+'''
+  #? Combined stream kline event, `x` is true once the kline is closed
+  {
+    "stream": "btcusdt@kline_1m",
+    "data": {
+      "e": "kline", "E": 1672515782136, "s": "BTCUSDT",
+      "k": {
+        "t": 1672515780000, "T": 1672515839999, "s": "BTCUSDT", "i": "1m",
+        "o": "0.0010", "c": "0.0020", "h": "0.0025", "l": "0.0015", "v": "1000",
+        "x": false, ...
+      }
+    }
+  }
+'''
+
+#? binance limits, see https://developers.binance.com/docs/binance-spot-api-docs/web-socket-streams
+MAX_STREAMS = 1024
+MAX_MESSAGES_PER_SECOND = 5
+#? streams per SUBSCRIBE message
+SUBSCRIBE_CHUNK_SIZE = 200
+
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+
+def streamName(symbol: str, interval: str) -> str:
+    """UTC kline stream of a tradepair, binance documents no timezone for streams other than +08:00"""
+    return f"{symbol.lower()}@kline_{interval}"
+
+def alignedToUtc(interval: str) -> bool:
+    """
+    Whether the UTC `interval` klines are the ones the REST api returns for
+    `binance.TIMEZONE_OFFSET`, only those can be streamed. Intervals longer
+    than the offset (4h, 1d, 1w with UTC+1) open at other times in UTC.
+    """
+    return (binance.TIMEZONE_OFFSET * 3600) % binance.INTERVALS[interval].total_seconds() == 0
+
+def parseClosedKline(payload: dict) -> CandleBatch | None:
+    """Single candle batch of a closed kline event, None for open klines"""
+    kline = payload['data']['k']
+    if not kline['x']:
+        return None
+    array = [kline['t'], kline['o'], kline['h'], kline['l'], kline['c'], kline['v'], kline['T']]
+    return binance.parseCandlesFromResponse([array], kline['s'], kline['i'])
+
+
+class KlineStream:
+    """
+    Single combined stream connection subscribed to the klines of `series`.
+
+    The connection lives in a background thread and is reopened with an
+    exponential backoff whenever it drops (network errors, the 24h limit
+    of binance connections, missed pings), every stream is subscribed again
+    on the new connection.
+
+    Parameters
+    ----------
+    series : list[tuple[str, str]]
+        (tradepair_name, timeframe) pairs, at most `MAX_STREAMS`.
+    on_candle : Callable[[CandleBatch], None]
+        Called from the stream thread with every closed candle.
+    on_connect : Callable[[KlineStream, float | None], None]
+        Called once the streams are subscribed with the time of the last
+        message received before, None on the first connection. Klines
+        closed in between were missed and have to be fetched from the REST api.
+    url : str
+        Combined stream endpoint.
+    """
+
+    def __init__(self, series: list[tuple[str, str]], on_candle: Callable[[CandleBatch], None],
+                 on_connect: Callable[["KlineStream", float | None], None] = None,
+                 url: str = BINANCE_STREAM_URL):
+        if len(series) > MAX_STREAMS:
+            raise ValueError(f"A connection holds at most {MAX_STREAMS} streams, got {len(series)}")
+
+        self.series = list(series)
+        self.on_candle = on_candle
+        self.on_connect = on_connect
+        self.url = url
+
+        self.last_message = None
+        self.connection = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> "KlineStream":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        connection = self.connection
+        if connection:
+            connection.close()
+
+    def join(self, timeout: float = None):
+        self.thread.join(timeout)
+
+    def run(self):
+        delay = RECONNECT_MIN_DELAY
+        while not self.stopped.is_set():
+            connected = time.monotonic()
+            try:
+                with connect(self.url, open_timeout=10) as connection:
+                    self.connection = connection
+                    self.subscribe(connection)
+                    if self.stopped.is_set():
+                        break
+
+                    if self.on_connect:
+                        self.on_connect(self, self.last_message)
+                    for message in connection:
+                        self.last_message = time.time()
+                        self.handle(json.loads(message))
+                    logger.warning("Kline stream closed by the server")
+            except (OSError, WebSocketException) as err:
+                logger.warning(f"Kline stream disconnected: {err!r}")
+            finally:
+                self.connection = None
+
+            if self.stopped.is_set():
+                break
+            #? a connection that dropped right after opening does not reset the backoff
+            if time.monotonic() - connected > RECONNECT_MAX_DELAY:
+                delay = RECONNECT_MIN_DELAY
+            logger.info(f"Reconnecting kline stream in {delay} seconds")
+            self.stopped.wait(delay * random.uniform(0.5, 1))
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def subscribe(self, connection):
+        names = [streamName(symbol, interval) for symbol, interval in self.series]
+        for request_id, start in enumerate(range(0, len(names), SUBSCRIBE_CHUNK_SIZE), start=1):
+            connection.send(json.dumps({
+                'method': 'SUBSCRIBE',
+                'params': names[start:start + SUBSCRIBE_CHUNK_SIZE],
+                'id': request_id,
+            }))
+            #? incoming messages are limited per connection
+            time.sleep(1 / MAX_MESSAGES_PER_SECOND)
+        logger.info(f"Subscribed to {len(names)} kline streams")
+
+    def handle(self, payload: dict):
+        if 'stream' not in payload:
+            #? reply to a SUBSCRIBE request
+            if payload.get('error'):
+                logger.error(f"Kline stream request {payload.get('id')} failed: {payload['error']}")
+            return
+
+        candle = parseClosedKline(payload)
+        if candle:
+            self.on_candle(candle)
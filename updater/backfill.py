@@ -0,0 +1,140 @@
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from updater.api import binance
+from updater.db import crud
+from updater import resample, swings
+from updater.candles import CandleBatch
+from updater.config import TIMEFRAMES, BINANCE_WORKERS
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+))
+logger.addHandler(console_handler)
+
+#? candles buffered per series before writing, enough for crud to load them with COPY
+BACKFILL_FLUSH_SIZE = crud.CANDLES_COPY_THRESHOLD
+
+
+def flushCandles(candles: CandleBatch, derived: list[str], from_listing: bool) -> int:
+    added = crud.addCandles(candles)
+    added_series = [added]
+    for timeframe in derived:
+        added_series.append(crud.addCandles(resample.resampleNewCandles(added, timeframe, from_listing=from_listing)))
+
+    #? history lands behind the swing watermarks, the updates would never scan it
+    for batch in added_series:
+        if len(batch):
+            detectBackfilledSwings(batch)
+    return len(added)
+
+def detectBackfilledSwings(added: CandleBatch):
+    """Store the historical swings of backfilled candles, without alerting the bot about them"""
+    detected, watermarks = [], {}
+    for (tradepair_name, timeframe), candles in added.series():
+        series_swings, watermark = swings.detectRangeSwings(tradepair_name, timeframe,
+                                                            candles.datetime_open[0].item(), candles.datetime_open[-1].item())
+        detected += series_swings
+        if watermark is not None:
+            watermarks[(tradepair_name, timeframe)] = watermark
+    if detected or watermarks:
+        logger.info(f"Found {len(detected)} swings in the backfilled candles")
+        crud.addSwings(detected, watermarks, notify=False)
+
+def backfillTradepair(tradepair_name: str, timeframe: str, derived: list[str]) -> int:
+    """
+    Page the history of a series from its listing (or its checkpoint) up to now.
+
+    Pages of `binance.MAX_CANDLES_LIMIT` klines are buffered and written every
+    `BACKFILL_FLUSH_SIZE` candles together with the derived timeframes, the
+    checkpoint then moves past the written candles, so an interrupted
+    backfill resumes from the last flush.
+
+    Returns
+    -------
+    int
+        Number of base candles added.
+    """
+    checkpoint = crud.selectBackfillCheckpoint(tradepair_name, timeframe)
+    if checkpoint and checkpoint['completed']:
+        return 0
+
+    interval = binance.INTERVALS[timeframe]
+    start_time = checkpoint['datetime_open'] if checkpoint else datetime.fromtimestamp(0)
+    from_listing = not checkpoint
+
+    added_count = 0
+    buffer, buffered = [], 0
+    completed = False
+    while not completed:
+        candles = binance.getTradepairCandles(tradepair_name, interval=timeframe,
+                                              limit=binance.MAX_CANDLES_LIMIT, start_time=start_time)
+        #? a short page means the history is exhausted
+        completed = len(candles) < binance.MAX_CANDLES_LIMIT
+        if len(candles):
+            buffer.append(candles)
+            buffered += len(candles)
+            start_time = candles.datetime_open[-1].item() + interval
+
+        if buffered >= BACKFILL_FLUSH_SIZE or completed:
+            added_count += flushCandles(CandleBatch.concat(buffer), derived, from_listing)
+            crud.setBackfillCheckpoint(tradepair_name, timeframe, start_time, completed)
+            buffer, buffered = [], 0
+            from_listing = False
+
+    logger.info(f"Backfilled {added_count} {timeframe} candles for {tradepair_name}")
+    return added_count
+
+def backfill(tradepair_names: list[str] = None, workers: int = BINANCE_WORKERS, restart: bool = False) -> int:
+    """
+    Load the full candle history of tradepairs, `workers` tradepairs at a time.
+
+    Parameters
+    ----------
+    tradepair_names : list[str], optional
+        Tradepairs to backfill, every tracked tradepair by default.
+    workers : int
+        Tradepairs backfilled in parallel, they share the Binance rate limiter.
+    restart : bool
+        Drop the saved checkpoints and start over from the listing.
+
+    Returns
+    -------
+    int
+        Number of base candles added.
+    """
+    fetched, derived = resample.planTimeframes(TIMEFRAMES)
+    crud.addTimeframes({name: binance.INTERVALS[name] for name in TIMEFRAMES})
+
+    if tradepair_names is None:
+        tradepair_names = [tp['name'] for tp in crud.selectTradepairs(tracking=True)]
+    logger.info(f"Backfilling {len(tradepair_names)} tradepairs with {workers} workers...")
+
+    added_count = 0
+    for timeframe in fetched:
+        targets = [name for name, base in derived.items() if base == timeframe]
+        if restart:
+            crud.deleteBackfillCheckpoints(tradepair_names, timeframe)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(backfillTradepair, tradepair_name, timeframe, targets): tradepair_name
+                for tradepair_name in tradepair_names
+            }
+            for future in as_completed(futures):
+                try:
+                    added_count += future.result()
+                except RuntimeError as err:
+                    #? the checkpoint keeps the progress, the next run resumes this tradepair
+                    logger.error(f"Backfill of {futures[future]} ({timeframe}) failed: {err}")
+
+    logger.info(f"Backfill completed, added {added_count} candles")
+    return added_count
@@ -0,0 +1,149 @@
+import time
+from datetime import datetime, timedelta
+from typing import Iterator
+
+import numpy as np
+
+COLUMNS = ('tradepair_name', 'timeframe_name', 'datetime_open', 'datetime_close', 'open', 'high', 'low', 'close')
+SERIES_COLUMNS = COLUMNS[2:]
+
+#? no timezone changes its UTC offset twice within this span
+OFFSET_SPAN = 20 * 86400
+EPOCH = datetime(1970, 1, 1)
+
+
+def segmentOffsets(seconds: np.ndarray, offsetOf) -> np.ndarray:
+    """
+    UTC offset in seconds of every value, `offsetOf` is called twice per
+    `OFFSET_SPAN` segment and once per value only in segments holding a change.
+    """
+    offsets = np.empty(len(seconds), dtype=np.int64)
+    if not len(seconds):
+        return offsets
+
+    segments = ((seconds - seconds.min()) // OFFSET_SPAN).astype(np.int64)
+    for segment in np.unique(segments):
+        indices = np.flatnonzero(segments == segment)
+        values = seconds[indices]
+        first, last = offsetOf(values.min()), offsetOf(values.max())
+        offsets[indices] = first if first == last else [offsetOf(value) for value in values]
+    return offsets
+
+def localDatetimes(epoch_ms: np.ndarray) -> np.ndarray:
+    """Naive local `datetime64[us]` of unix milliseconds, the values `datetime.fromtimestamp()` gives"""
+    epoch_ms = np.asarray(epoch_ms, dtype=np.int64)
+    offsets = segmentOffsets(epoch_ms / 1000, lambda value: time.localtime(value).tm_gmtoff)
+    return (epoch_ms + offsets * 1000).astype('datetime64[ms]').astype('datetime64[us]')
+
+def epochSeconds(datetimes: np.ndarray) -> np.ndarray:
+    """Unix seconds of naive local `datetime64` values, the values `datetime.timestamp()` gives"""
+    local = datetimes.astype('datetime64[us]').astype(np.int64) / 1_000_000
+    offsets = segmentOffsets(local, lambda value: value - (EPOCH + timedelta(seconds=float(value))).timestamp())
+    return local - offsets
+
+
+class CandleBatch:
+    """
+    Candles as a struct of arrays, one row per candle.
+
+    Candles stay in this shape from parsing klines to inserting them and
+    resampling, dicts are built only for JSON responses with `toDicts()`.
+    Tradepair and timeframe names are object arrays sharing their strings,
+    datetimes are naive local `datetime64[us]` like the stored ones.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, tradepair_name: np.ndarray, timeframe_name: np.ndarray, datetime_open: np.ndarray,
+                 datetime_close: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        self.tradepair_name = tradepair_name
+        self.timeframe_name = timeframe_name
+        self.datetime_open = datetime_open
+        self.datetime_close = datetime_close
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+
+    @classmethod
+    def empty(cls) -> "CandleBatch":
+        return cls.fromSeries('', '', {
+            'datetime_open': np.empty(0, dtype='datetime64[us]'),
+            'datetime_close': np.empty(0, dtype='datetime64[us]'),
+            **{name: np.empty(0, dtype=np.float64) for name in ('open', 'high', 'low', 'close')},
+        })
+
+    @classmethod
+    def fromSeries(cls, tradepair_name: str, timeframe_name: str, columns: dict[str, np.ndarray]) -> "CandleBatch":
+        """Batch of a single series from its columns (see `crud.SERIES_DTYPES`)"""
+        rows = len(columns['datetime_open'])
+        return cls(
+            np.full(rows, tradepair_name, dtype=object), np.full(rows, timeframe_name, dtype=object),
+            *(columns[name] for name in SERIES_COLUMNS),
+        )
+
+    @classmethod
+    def fromKlines(cls, klines: list[list], symbol: str, interval: str) -> "CandleBatch":
+        """Batch of the klines of a Binance response, see the layout in `binance`"""
+        if not klines:
+            return cls.empty()
+        table = np.array([kline[:7] for kline in klines], dtype=object)
+        prices = table[:, 1:5].astype(np.float64)
+        return cls(
+            np.full(len(klines), symbol, dtype=object), np.full(len(klines), interval, dtype=object),
+            localDatetimes(table[:, 0].astype(np.int64)), localDatetimes(table[:, 6].astype(np.int64)),
+            prices[:, 0], prices[:, 1], prices[:, 2], prices[:, 3],
+        )
+
+    @classmethod
+    def fromRows(cls, rows: list[tuple]) -> "CandleBatch":
+        """Batch of database rows holding the `COLUMNS` in order"""
+        if not rows:
+            return cls.empty()
+        tradepair_names, timeframe_names, opens, closes, *prices = zip(*rows)
+        return cls(
+            np.array(tradepair_names, dtype=object), np.array(timeframe_names, dtype=object),
+            np.array(opens, dtype='datetime64[us]'), np.array(closes, dtype='datetime64[us]'),
+            *(np.array(column, dtype=np.float64) for column in prices),
+        )
+
+    @classmethod
+    def concat(cls, batches: list["CandleBatch"]) -> "CandleBatch":
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(*(np.concatenate([getattr(batch, name) for batch in batches]) for name in COLUMNS))
+
+    def __len__(self) -> int:
+        return len(self.datetime_open)
+
+    def __getitem__(self, index) -> "CandleBatch":
+        """Rows selected by a slice, a boolean mask or indices"""
+        return CandleBatch(*(getattr(self, name)[index] for name in COLUMNS))
+
+    def columns(self) -> dict[str, np.ndarray]:
+        """Columns of the candles without the series names, the shape `cache` keeps"""
+        return {name: getattr(self, name) for name in SERIES_COLUMNS}
+
+    def series(self) -> Iterator[tuple[tuple[str, str], "CandleBatch"]]:
+        """(tradepair_name, timeframe_name) and candles of every series in the batch, in chronological order"""
+        if not len(self):
+            return
+        tradepair_names, tradepair_codes = np.unique(self.tradepair_name, return_inverse=True)
+        timeframe_names, timeframe_codes = np.unique(self.timeframe_name, return_inverse=True)
+        codes = tradepair_codes.ravel() * len(timeframe_names) + timeframe_codes.ravel()
+        #? rows ordered by series, then by open datetime
+        order = np.lexsort((self.datetime_open, codes))
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+        for rows in np.split(order, starts[1:]):
+            tradepair_code, timeframe_code = divmod(codes[rows[0]], len(timeframe_names))
+            yield (tradepair_names[tradepair_code], timeframe_names[timeframe_code]), self[rows]
+
+    def toDicts(self) -> list[dict]:
+        """Candle dicts in the shape of `Candle.to_dict()`"""
+        values = [self.tradepair_name.tolist(), self.timeframe_name.tolist()]
+        values += [getattr(self, name).astype(object) for name in ('datetime_open', 'datetime_close')]
+        values += [getattr(self, name).tolist() for name in ('open', 'high', 'low', 'close')]
+        return [dict(zip(COLUMNS, row)) for row in zip(*values)]
@@ -3,7 +3,38 @@ from dotenv import load_dotenv
 
 load_dotenv() 
 
+#? only needed by the processes notifying the bot, checked by `updater.notify`
 BOT_SERVER_URL=os.getenv("BOT_SERVER_URL")
 
-if not BOT_SERVER_URL:
-    raise AttributeError("Bot URL not found. Check .env file.")
+BINANCE_API_URL = os.getenv("BINANCE_API_URL", "https://data-api.binance.vision/api/v3")
+#? combined kline streams, market data only endpoint
+BINANCE_STREAM_URL = os.getenv("BINANCE_STREAM_URL", "wss://data-stream.binance.vision/stream")
+
+#? concurrent candle fetching
+BINANCE_WORKERS = int(os.getenv("BINANCE_WORKERS", 8))
+BINANCE_WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", 6000))
+
+#? timeframes to track, the lowest one is fetched and the others are resampled from it when possible
+TIMEFRAMES = [name.strip() for name in os.getenv("TIMEFRAMES", "1w").split(",") if name.strip()]
+
+#? in-process cache of the latest candles of every tradepair and timeframe
+CANDLE_CACHE_SIZE_MB = int(os.getenv("CANDLE_CACHE_SIZE_MB", 64))
+CANDLE_CACHE_SERIES_SIZE = int(os.getenv("CANDLE_CACHE_SERIES_SIZE", 2000))
+CANDLE_CACHE_TTL = int(os.getenv("CANDLE_CACHE_TTL", 600))
+
+#? swings sent to the bot per request and seconds between checks of the notification outbox
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", 500))
+NOTIFY_POLL_INTERVAL = float(os.getenv("NOTIFY_POLL_INTERVAL", 5))
+
+#? seconds waited after a candle close before fetching it, binance needs a moment to publish the closed kline
+UPDATE_SETTLE_DELAY = float(os.getenv("UPDATE_SETTLE_DELAY", 5))
+
+#? tradepairs are split into this many shards, claimed by the `manager.py start worker` processes
+UPDATER_SHARDS = int(os.getenv("UPDATER_SHARDS", 64))
+#? seconds a worker keeps its shards without renewing them, shards of a dead worker are taken over after it
+WORKER_LEASE_TTL = float(os.getenv("WORKER_LEASE_TTL", 30))
+#? whether `manager.py start updater` runs the scheduled updates itself, turned off when workers run them
+SCHEDULE_UPDATES = os.getenv("SCHEDULE_UPDATES", "true").lower() in ("1", "true", "yes")
+
+#? port the stream and worker processes serve their metrics on, the updater server serves them on /metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
@@ -0,0 +1,240 @@
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+import numpy as np
+
+from updater.candles import CandleBatch
+
+#? candle columns kept by the cache, every series is a struct of contiguous arrays (see `crud.SERIES_DTYPES`)
+DATETIME_COLUMNS = ('datetime_open', 'datetime_close')
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def toCandles(tradepair_name: str, timeframe: str, columns: dict[str, np.ndarray]) -> list[dict]:
+    """Candle dicts in the shape of `Candle.to_dict()`, in the order of `columns`"""
+    return CandleBatch.fromSeries(tradepair_name, timeframe, columns).toDicts()
+
+
+class CachedSeries:
+    """
+    Latest candles of a series, oldest first.
+
+    Every stored candle opened at or after the first cached one is cached,
+    `complete` tells whether the series has no stored candle before it.
+    """
+
+    def __init__(self, columns: dict[str, np.ndarray], complete: bool):
+        self.columns = columns
+        self.complete = complete
+        self.loaded = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.columns['datetime_open'])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def covers(self, since: np.datetime64) -> bool:
+        """Whether every stored candle opened at or after `since` is cached"""
+        return self.complete or (len(self) > 0 and since >= self.columns['datetime_open'][0])
+
+    def continues(self, columns: dict[str, np.ndarray]) -> bool:
+        """Whether candles past the cached ones start right where the cached ones end"""
+        if not len(self) or not len(columns['datetime_open']):
+            return True
+        opens = columns['datetime_open']
+        newer = opens > self.columns['datetime_open'][-1]
+        if not newer.any():
+            return True
+        #? binance closes a kline a millisecond before the next one opens
+        return opens[newer][0] == self.columns['datetime_close'][-1] + np.timedelta64(1, 'ms')
+
+    def endsAt(self, datetime_open: datetime) -> bool:
+        return len(self) > 0 and self.columns['datetime_open'][-1] == np.datetime64(datetime_open, 'us')
+
+    def merge(self, columns: dict[str, np.ndarray]):
+        """Add candles covering the series from their first one on, they replace the cached ones they overlap"""
+        opens = columns['datetime_open']
+        if len(opens):
+            #? cached candles past the start of the new ones are kept only where the new ones have a gap
+            keep = (self.columns['datetime_open'] < opens[0]) | ~np.isin(self.columns['datetime_open'], opens)
+            merged = {name: np.concatenate((self.columns[name][keep], columns[name])) for name in columns}
+            order = np.argsort(merged['datetime_open'], kind='stable')
+            self.columns = {name: column[order] for name, column in merged.items()}
+
+    def trim(self, size: int):
+        if len(self) > size:
+            self.columns = {name: column[-size:] for name, column in self.columns.items()}
+            self.complete = False
+
+
+class CandleCache:
+    """
+    Process-local LRU cache of the latest candles of every (tradepair, timeframe).
+
+    Series are cached when read from the database and extended with the candles
+    inserted afterwards, so reads of recent candles skip the database.
+    Candles written by other processes (the stream, backfills, other workers)
+    become visible once an entry is older than `ttl` seconds and is read again
+    from the database, or right away for reads passing the `latest` stored
+    open datetime. An entry that would get a gap from candles inserted past
+    ones it never saw is dropped.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memory cap of the cached columns, least recently used series are evicted above it.
+    series_size : int
+        Latest candles kept per series.
+    ttl : float
+        Seconds an entry is served before it is reloaded.
+    """
+
+    def __init__(self, max_bytes: int, series_size: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.series_size = series_size
+        self.ttl = ttl
+
+        self.lock = threading.Lock()
+        self.series = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tradepair_name: str, timeframe: str, since: datetime = None, lookback: int = 0,
+            include_since: bool = False, latest: datetime = None) -> dict[str, np.ndarray] | None:
+        """
+        Cached columns of the candles opened after `since` (or at it with
+        `include_since`), preceded by the `lookback` latest candles before them.
+        Without `since` the whole series is returned. None when the cache
+        does not hold all of them, or when its latest candle is not the
+        `latest` one stored, i.e. another process wrote to the series.
+        """
+        with self.lock:
+            entry = self.entry(tradepair_name, timeframe)
+            if entry is not None and latest is not None and not entry.endsAt(latest):
+                self.discard((tradepair_name, timeframe))
+                entry = None
+            columns = None
+            if entry is not None:
+                if since is None:
+                    if entry.complete:
+                        columns = dict(entry.columns)
+                else:
+                    opens = entry.columns['datetime_open']
+                    since = np.datetime64(since, 'us')
+                    first = np.searchsorted(opens, since, side='left' if include_since else 'right') - lookback
+                    #? the lookback candles have to be cached too
+                    if entry.covers(since) and (first >= 0 or entry.complete):
+                        columns = {name: column[max(first, 0):] for name, column in entry.columns.items()}
+            return self.count(tradepair_name, timeframe, columns)
+
+    def window(self, tradepair_name: str, timeframe: str, since: datetime = None, until: datetime = None,
+               limit: int = None, newest_first: bool = False, exclusive: bool = False) -> dict[str, np.ndarray] | None:
+        """
+        Cached columns of the candles opened from `since` (excluded with
+        `exclusive`) up to `until` (excluded), oldest first. With `limit` only
+        the oldest ones are kept, or the newest ones with `newest_first`.
+        None when the cache does not hold all of them.
+        """
+        with self.lock:
+            entry = self.entry(tradepair_name, timeframe)
+            columns = None
+            if entry is not None:
+                opens = entry.columns['datetime_open']
+                if since is not None:
+                    since = np.datetime64(since, 'us')
+                first = np.searchsorted(opens, since, side='right' if exclusive else 'left') if since is not None else 0
+                last = np.searchsorted(opens, np.datetime64(until, 'us')) if until is not None else len(opens)
+                last = max(first, last)
+
+                #? the newest candles of a range are cached whenever there are enough of them
+                covered = entry.complete or (since is not None and entry.covers(since))
+                if limit is not None and last - first >= limit:
+                    covered = covered or newest_first
+                    first, last = (last - limit, last) if newest_first else (first, first + limit)
+                if covered:
+                    columns = {name: column[first:last] for name, column in entry.columns.items()}
+            return self.count(tradepair_name, timeframe, columns)
+
+    def put(self, tradepair_name: str, timeframe: str, columns: dict[str, np.ndarray], complete: bool):
+        """Cache candles read from the database, they cover the series from their first candle on"""
+        key = (tradepair_name, timeframe)
+        opens = columns['datetime_open']
+        if not complete and not len(opens):
+            return
+
+        with self.lock:
+            entry = self.series.get(key)
+            if entry is None or complete or not len(entry) or opens[0] <= entry.columns['datetime_open'][0]:
+                self.discard(key)
+                entry = CachedSeries(columns, complete)
+            else:
+                #? the older cached candles keep the load time of their entry
+                self.nbytes -= entry.nbytes
+                entry.merge(columns)
+            self.store(key, entry)
+
+    def add(self, candles: CandleBatch):
+        """Extend the cached series with freshly inserted candles"""
+        with self.lock:
+            for key, series in candles.series():
+                entry = self.series.get(key)
+                if entry is None:
+                    continue
+
+                columns = series.columns()
+                #? candles older than the cached range may not be contiguous with it
+                if not entry.complete and len(entry):
+                    newer = columns['datetime_open'] >= entry.columns['datetime_open'][0]
+                    columns = {name: column[newer] for name, column in columns.items()}
+                #? another process stored the candles in between, they are not cached
+                if not entry.continues(columns):
+                    self.discard(key)
+                    continue
+
+                self.nbytes -= entry.nbytes
+                entry.merge(columns)
+                self.store(key, entry)
+
+    def invalidate(self, tradepair_name: str = None, timeframe: str = None):
+        with self.lock:
+            for key in [key for key in self.series
+                        if tradepair_name in (None, key[0]) and timeframe in (None, key[1])]:
+                self.discard(key)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'series': len(self.series), 'bytes': self.nbytes, 'hits': self.hits, 'misses': self.misses}
+
+    def entry(self, tradepair_name: str, timeframe: str) -> CachedSeries | None:
+        key = (tradepair_name, timeframe)
+        entry = self.series.get(key)
+        if entry is not None and time.monotonic() - entry.loaded > self.ttl:
+            self.discard(key)
+            return None
+        return entry
+
+    def count(self, tradepair_name: str, timeframe: str, columns: dict | None) -> dict | None:
+        if columns is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.series.move_to_end((tradepair_name, timeframe))
+        return columns
+
+    def store(self, key: tuple[str, str], entry: CachedSeries):
+        entry.trim(self.series_size)
+        self.series[key] = entry
+        self.series.move_to_end(key)
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes and self.series:
+            self.discard(next(iter(self.series)))
+
+    def discard(self, key: tuple[str, str]):
+        entry = self.series.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
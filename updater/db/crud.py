@@ -1,15 +1,56 @@
-from updater.db.engine import engine
-from updater.db.models import Tradepair, Candle, Swing, Timeframe,swing_candle_link
-from sqlalchemy import select, update, func
+from updater.db.engine import getEngine
+from updater.db import cache
+from updater import metrics
+from updater.candles import CandleBatch, COLUMNS
+from updater.config import CANDLE_CACHE_SIZE_MB, CANDLE_CACHE_SERIES_SIZE, CANDLE_CACHE_TTL
+from updater.db.models import Tradepair, Candle, Swing, Timeframe, SwingWatermark, SwingNotification, BackfillCheckpoint, UpdaterWorker, ShardLease, swing_candle_link
+from sqlalchemy import select, update, delete, func, table, column, text, literal
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from collections.abc import Callable
+import csv
+import io
+
+import numpy as np
+
+#? rows per INSERT statement
+CANDLES_BATCH_SIZE = 5000
+#? backfills this large are loaded with COPY through a staging table
+CANDLES_COPY_THRESHOLD = 20000
+#? swings per INSERT statement
+SWINGS_BATCH_SIZE = 1000
+
+#? columns (and their dtype) of the array reads, see `selectColumns()`
+SERIES_DTYPES = {
+    **dict.fromkeys(cache.DATETIME_COLUMNS, 'datetime64[us]'),
+    **dict.fromkeys(cache.PRICE_COLUMNS, np.float64),
+}
+SWING_DTYPES = {'id': np.int64, 'orientation_up': np.bool_, 'pivot_datetime_open': 'datetime64[us]'}
+
+#? the whole batch is bound as one array per column, the statement text does not depend on its size
+UNNEST_CANDLES = text(f"""
+    INSERT INTO candle ({', '.join(COLUMNS)})
+    SELECT * FROM unnest(
+        CAST(:tradepair_name AS varchar[]), CAST(:timeframe_name AS varchar[]),
+        CAST(:datetime_open AS timestamp[]), CAST(:datetime_close AS timestamp[]),
+        CAST(:open AS float8[]), CAST(:high AS float8[]), CAST(:low AS float8[]), CAST(:close AS float8[])
+    )
+    ON CONFLICT (tradepair_name, timeframe_name, datetime_open) DO NOTHING
+    RETURNING {', '.join(COLUMNS)}
+""")
+
+candle_cache = cache.CandleCache(
+    max_bytes=CANDLE_CACHE_SIZE_MB * 1024 * 1024,
+    series_size=CANDLE_CACHE_SERIES_SIZE,
+    ttl=CANDLE_CACHE_TTL,
+)
 
 
 @contextmanager
 def getSession():
-    session = Session(engine, expire_on_commit=False)
+    session = Session(getEngine(), expire_on_commit=False)
     #session.begin()
     try:
         yield session
@@ -21,47 +62,213 @@ def getSession():
         session.close()
 
 
+def toDict(result):
+    if result == None:
+        return []
+    if type(result) == tuple:
+        return tuple(toDict(item) for item in result)
+    if type(result) == list:            
+        return [row.to_dict() for row in result]
+    return result.to_dict()
+
 def returnDict(func: Callable):
     def inner(*args, **kwargs):
-        result = func(*args, **kwargs)
-        if result == None:
-            return []
-        if type(result) == list:            
-            return [row.to_dict() for row in result]
-        return result.to_dict()
+        return toDict(func(*args, **kwargs))
     return inner
 
-@returnDict
-def selectTradepairs(tracking: bool = None) -> list[Tradepair]:
-    with getSession() as session:
-        stmt = select(Tradepair).order_by(Tradepair.name)
-        if tracking != None:
-            stmt = stmt.where(Tradepair.tracking == tracking)
-        return session.scalars(stmt).all()
+def selectRows(stmt) -> list[dict]:
+    """
+    Rows of a read-only Core select as dicts keyed by column name.
 
+    No session is opened and no ORM entity is loaded, selecting every column
+    of a table (`tableColumns()`) gives the shape of `to_dict()`.
+    """
+    with getEngine().connect() as connection:
+        result = connection.execute(stmt)
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result]
 
-@returnDict
-def selectCandles(tradepair_name: str = None, timeframe: str = None) -> list[Candle]:
-    with getSession() as session:
-        stmt = select(Candle).order_by(Candle.datetime_open.desc())
+def selectColumns(stmt, dtypes: dict) -> dict[str, np.ndarray]:
+    """Rows of a read-only Core select as one array per column, `dtypes` maps the selected columns to their dtype, in order"""
+    with getEngine().connect() as connection:
+        rows = connection.execute(stmt).all()
+    values = list(zip(*rows)) or [()] * len(dtypes)
+    return {name: np.array(column, dtype=dtype) for (name, dtype), column in zip(dtypes.items(), values)}
 
-        if tradepair_name:
-            stmt = stmt.where(Candle.tradepair_name == tradepair_name)
-        if timeframe:
-            stmt = stmt.where(Candle.timeframe_name == timeframe)
-            
-        return session.scalars(stmt).all()
+def tableColumns(model) -> list:
+    return list(model.__table__.columns)
 
-@returnDict
-def selectSwings(tradepair_name: str, timeframe: str, amount: int = 5) -> list[Swing]:
+def selectTradepairs(tracking: bool = None) -> list[dict]:
+    stmt = select(*tableColumns(Tradepair)).order_by(Tradepair.name)
+    if tracking != None:
+        stmt = stmt.where(Tradepair.tracking == tracking)
+    return selectRows(stmt)
+
+def countTradepairs() -> dict[str, int]:
+    """Number of stored tradepairs, of the tracked ones and of the delisted ones, in a single scan"""
+    stmt = select(
+        func.count().label('total'),
+        func.count().filter(Tradepair.tracking).label('tracking'),
+        func.count().filter(Tradepair.delisted).label('delisted'),
+    )
+    return selectRows(stmt)[0]
+
+
+def selectCandles(tradepair_name: str = None, timeframe: str = None, since: datetime = None,
+                  oldest_first: bool = False, until: datetime = None, after: datetime = None,
+                  limit: int = None) -> list[dict]:
+    """
+    Candles opened from `since` up to `until` (excluded), newest first unless `oldest_first`.
+
+    `after` is a keyset cursor, the open datetime of the last candle of the
+    previous page: only candles past it in the selected order are returned.
+    `limit` caps the number of candles. Candles of a single series are read
+    through `candle_cache`.
+    """
+    if tradepair_name and timeframe:
+        columns = selectCandleColumns(tradepair_name, timeframe, since=since, oldest_first=oldest_first,
+                                      until=until, after=after, limit=limit)
+        return cache.toCandles(tradepair_name, timeframe, columns)
+
+    stmt = select(*tableColumns(Candle)).where(*candleFilters(since, until, after, oldest_first)).limit(limit)
+    stmt = stmt.order_by(Candle.datetime_open if oldest_first else Candle.datetime_open.desc())
+    if tradepair_name:
+        stmt = stmt.where(Candle.tradepair_name == tradepair_name)
+    if timeframe:
+        stmt = stmt.where(Candle.timeframe_name == timeframe)
+    return selectRows(stmt)
+
+def selectCandleColumns(tradepair_name: str, timeframe: str, since: datetime = None, oldest_first: bool = False,
+                        until: datetime = None, after: datetime = None, limit: int = None) -> dict[str, np.ndarray]:
+    """Same selection as `selectCandles()` for a single series, as `SERIES_DTYPES` columns in the selected order"""
+    filters = candleFilters(since, until, after, oldest_first)
+
+    #? the cursor is one more bound in the direction of the order
+    exclusive = False
+    if after is not None:
+        if oldest_first:
+            if since is None or after >= since:
+                since, exclusive = after, True
+        else:
+            until = min(until, after) if until else after
+
+    columns = candle_cache.window(tradepair_name, timeframe, since=since, until=until, limit=limit,
+                                  newest_first=not oldest_first, exclusive=exclusive)
+    if columns is None:
+        order = Candle.datetime_open if oldest_first else Candle.datetime_open.desc()
+        stmt = seriesColumns(tradepair_name, timeframe).where(*filters).order_by(order).limit(limit)
+        columns = selectColumns(stmt, SERIES_DTYPES)
+        if not oldest_first:
+            columns = {name: column[::-1] for name, column in columns.items()}
+
+        #? only a range reaching the latest candle can be cached
+        if until is None and after is None and (limit is None or not oldest_first):
+            complete = since is None and (limit is None or len(columns['datetime_open']) < limit)
+            candle_cache.put(tradepair_name, timeframe, columns, complete)
+
+    if oldest_first:
+        return columns
+    return {name: column[::-1] for name, column in columns.items()}
+
+def candleFilters(since: datetime = None, until: datetime = None, after: datetime = None, oldest_first: bool = False) -> list:
+    filters = []
+    if since:
+        filters.append(Candle.datetime_open >= since)
+    if until:
+        filters.append(Candle.datetime_open < until)
+    if after:
+        filters.append(Candle.datetime_open > after if oldest_first else Candle.datetime_open < after)
+    return filters
+
+def selectCandleSeries(tradepair_name: str, timeframe: str, since: datetime = None,
+                       lookback: int = 0, latest: datetime = None) -> dict[str, np.ndarray]:
+    """
+    `SERIES_DTYPES` columns of the candles of a series, oldest first.
+
+    With `since` only candles opened after it are selected, preceded by
+    the `lookback` latest candles opened at or before it. The series is
+    read through `candle_cache`. Other processes write to the same series,
+    `latest`, the open datetime of the latest stored candle (see
+    `selectLatestCandleOpens()`), checks the cache against their writes.
+    """
+    columns = candle_cache.get(tradepair_name, timeframe, since=since, lookback=lookback, latest=latest)
+    if columns is not None:
+        return columns
+
+    stmt = seriesColumns(tradepair_name, timeframe)
+    if since is None:
+        columns = selectColumns(stmt.order_by(Candle.datetime_open), SERIES_DTYPES)
+        complete = True
+    else:
+        older = selectColumns(
+            stmt.where(Candle.datetime_open <= since)
+            .order_by(Candle.datetime_open.desc())
+            .limit(lookback),
+            SERIES_DTYPES,
+        )
+        newer = selectColumns(stmt.where(Candle.datetime_open > since).order_by(Candle.datetime_open), SERIES_DTYPES)
+        columns = {name: np.concatenate((older[name][:lookback][::-1], newer[name])) for name in SERIES_DTYPES}
+        #? fewer candles than asked for means the series starts there
+        complete = len(older['datetime_open']) < lookback
+
+    candle_cache.put(tradepair_name, timeframe, columns, complete)
+    return columns
+
+def selectLatestCandleOpens(timeframe: str, tradepair_names: list[str]) -> dict[str, datetime]:
+    """Open datetime of the latest stored `timeframe` candle of each tradepair, those without candles are left out"""
+    #? a correlated max() per tradepair is an index lookup each, a GROUP BY would scan every candle
+    latest = (
+        select(func.max(Candle.datetime_open))
+        .where(Candle.tradepair_name == Tradepair.name, Candle.timeframe_name == timeframe)
+        .scalar_subquery()
+    )
+    stmt = select(Tradepair.name, latest).where(Tradepair.name.in_(tradepair_names))
+    with getEngine().connect() as connection:
+        return {name: datetime_open for name, datetime_open in connection.execute(stmt) if datetime_open is not None}
+
+def seriesColumns(tradepair_name: str, timeframe: str):
+    return (
+        select(*[Candle.__table__.c[name] for name in SERIES_DTYPES])
+        .where(Candle.tradepair_name == tradepair_name, Candle.timeframe_name == timeframe)
+    )
+
+def selectSwingWatermark(tradepair_name: str, timeframe: str) -> datetime | None:
     with getSession() as session:
-        stmt = (
-            select(Swing)
-            .where(Swing.tradepair_name == tradepair_name, Swing.timeframe_name == timeframe)
-            .order_by(Swing.id.desc())
-            .limit(amount)
+        return session.scalar(
+            select(SwingWatermark.datetime_open)
+            .where(SwingWatermark.tradepair_name == tradepair_name, SwingWatermark.timeframe_name == timeframe)
         )
-        return session.scalars(stmt).all()
+
+def upsertSwingWatermarks(session: Session, watermarks: dict):
+    stmt = insert(SwingWatermark).values([
+        {'tradepair_name': tradepair_name, 'timeframe_name': timeframe, 'datetime_open': datetime_open}
+        for (tradepair_name, timeframe), datetime_open in watermarks.items()
+    ])
+    #? watermarks only move forward, a backfill racing an update never rewinds them
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=SwingWatermark.__table__.primary_key.columns,
+        set_={'datetime_open': func.greatest(SwingWatermark.datetime_open, stmt.excluded.datetime_open)}
+    ))
+
+def selectSwings(tradepair_name: str, timeframe: str, amount: int = 5, before_id: int = None) -> list[dict]:
+    """Latest swings of a series, newest first. `before_id` is a keyset cursor, the id of the last swing of the previous page"""
+    return selectRows(swingsStatement(tradepair_name, timeframe, amount, before_id, tableColumns(Swing)))
+
+def selectSwingColumns(tradepair_name: str, timeframe: str, amount: int = 5, before_id: int = None) -> dict[str, np.ndarray]:
+    """Same selection as `selectSwings()`, as arrays of the `SWING_DTYPES` columns"""
+    columns = [Swing.__table__.c[name] for name in SWING_DTYPES]
+    return selectColumns(swingsStatement(tradepair_name, timeframe, amount, before_id, columns), SWING_DTYPES)
+
+def swingsStatement(tradepair_name: str, timeframe: str, amount: int, before_id: int | None, columns: list):
+    stmt = (
+        select(*columns)
+        .where(Swing.tradepair_name == tradepair_name, Swing.timeframe_name == timeframe)
+        .order_by(Swing.id.desc())
+        .limit(amount)
+    )
+    if before_id is not None:
+        stmt = stmt.where(Swing.id < before_id)
+    return stmt
 
 @returnDict
 def addTradepairs(tradepairs: list[str]):
@@ -97,103 +304,305 @@ def switchTradepairsTrackingStatus(tracking: bool, selected_tradepairs: list[str
         )
         return session.scalars(stmt).all()
 
-@returnDict
-def addCandles(klines: list) -> list[Candle]:
-    added_candles = []
-
-    with getSession() as session:
-        for kline in klines:
-            stmt = select(Candle.tradepair_name, Candle.timeframe, Candle.datetime_open).where(
-                (Candle.tradepair_name == kline['tradepair_name']) &
-                (Candle.timeframe_name == kline['timeframe_name']) &
-                (Candle.datetime_open == kline['datetime_open'])
-            )
-            exists = session.execute(stmt).first()
-            if not exists:
-                candle = Candle(**kline)
-                session.add(candle)
-                added_candles.append(candle)
+def addCandles(candles: CandleBatch) -> CandleBatch:
+    """
+    Adds candles to the database, skipping the ones that are already stored.
+
+    Candles are written in batches of `CANDLES_BATCH_SIZE`, each one a single
+    `INSERT ... SELECT FROM unnest(...) ON CONFLICT DO NOTHING RETURNING`
+    taking one array per column. Batches of `CANDLES_COPY_THRESHOLD`
+    candles or more go through `copyCandles()`.
+
+    Parameters
+    ----------
+    candles : CandleBatch
+        Candles as returned by `binance.getCandles()`.
 
+    Returns
+    -------
+    CandleBatch
+        Only the newly inserted candles, they are also added to the series held by `candle_cache`.
+    """
+    if not len(candles):
+        return CandleBatch.empty()
+
+    if len(candles) >= CANDLES_COPY_THRESHOLD:
+        added_candles = copyCandles(candles)
+        metrics.candles_inserted_rows.labels('copy').observe(len(added_candles))
+    else:
+        rows = []
+        with getSession() as session:
+            for start in range(0, len(candles), CANDLES_BATCH_SIZE):
+                batch = candles[start:start + CANDLES_BATCH_SIZE]
+                batch_rows = session.execute(UNNEST_CANDLES, candleArrays(batch)).all()
+                metrics.candles_inserted_rows.labels('unnest').observe(len(batch_rows))
+                rows += batch_rows
+        added_candles = CandleBatch.fromRows(rows)
+
+    candle_cache.add(added_candles)
     return added_candles
 
+def candleValues(candles: CandleBatch) -> dict[str, list[str]]:
+    """Text of every value of the candles, per column in the order of `COLUMNS`"""
+    return {
+        'tradepair_name': candles.tradepair_name.tolist(),
+        'timeframe_name': candles.timeframe_name.tolist(),
+        'datetime_open': np.datetime_as_string(candles.datetime_open).tolist(),
+        'datetime_close': np.datetime_as_string(candles.datetime_close).tolist(),
+        #? repr of a float is the shortest string parsed back to the same value
+        **{name: list(map(repr, getattr(candles, name).tolist())) for name in ('open', 'high', 'low', 'close')},
+    }
+
+def candleArrays(candles: CandleBatch) -> dict[str, str]:
+    """
+    Bind parameters of `UNNEST_CANDLES`, every column is sent as one array
+    literal parsed by the database, adapting the values one by one costs more than the insert.
+    """
+    return {name: '{' + ','.join(values) + '}' for name, values in candleValues(candles).items()}
+
+def copyCandles(candles: CandleBatch) -> CandleBatch:
+    """
+    Bulk loads candles with `COPY` into a temporary staging table and moves
+    the new ones into `candle` with a single `INSERT ... SELECT ... ON CONFLICT DO NOTHING`.
+
+    Returns the newly inserted candles like `addCandles()`.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(zip(*candleValues(candles).values()))
+    buffer.seek(0)
+
+    with getSession() as session:
+        connection = session.connection()
+        connection.exec_driver_sql(
+            "CREATE TEMPORARY TABLE candle_staging (LIKE candle INCLUDING DEFAULTS) ON COMMIT DROP")
+        copy_sql = f"COPY candle_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        with connection.connection.cursor() as cursor:
+            if hasattr(cursor, "copy_expert"):
+                #? psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:
+                #? psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+
+        staging = table("candle_staging", *[column(name) for name in COLUMNS])
+        stmt = (
+            insert(Candle)
+            .from_select(COLUMNS, select(staging))
+            .on_conflict_do_nothing(index_elements=Candle.__table__.primary_key.columns)
+            .returning(*(getattr(Candle, name) for name in COLUMNS))
+        )
+        return CandleBatch.fromRows(session.execute(stmt).all())
+
 @returnDict
-def addSwing(tradepair_name: str, timeframe: str, candles: list[dict], orientation_up: bool) -> Swing:
+def addSwings(swings: list[dict], watermarks: dict = None, notify: bool = True) -> list[Swing]:
     """
-    Adds a new Swing to the database if it does not already exist.
-    
+    Adds a batch of swings to the database, skipping the ones that already exist.
+
+    Tradepairs and timeframes are checked once for the whole batch. Swings are
+    inserted in bulk with `ON CONFLICT DO NOTHING` on their identity (series,
+    orientation and pivot candle), so deduplication is a unique index probe.
+    Candle links and the bot notifications (see `claimSwingNotifications()`)
+    are inserted for the new swings only, all in one transaction.
+
     Parameters
     ----------
-    tradepair_name : str 
-        The name of the tradepair.
-    timeframe : str
-        The timeframe name of the candles.
-    candles : list[dict] 
-        A list of candle dictionaries from `returnDict()`.
-    orientation_up : bool
-        True for swing high, False for swing low.
-        
+    swings : list[dict]
+        Swings as produced by `swings.detectNewSwings()`: `tradepair_name`,
+        `timeframe_name`, `orientation_up`, `pivot_datetime_open` and `candles`,
+        the open datetimes of the window candles in chronological order.
+    watermarks : dict[tuple[str, str], datetime], optional
+        Swing watermarks to move in the same transaction, keyed by (tradepair, timeframe).
+    notify : bool
+        Whether the new swings are queued for delivery to the bot.
+
     Returns
     -------
-    Swing
-        The created Swing object.
+    list[Swing]
+        The created Swing objects.
     """
-    new_swing = None
+    new_swings = []
     with getSession() as session:
-        # Ensure the tradepair exists
-        tradepair = session.scalar(select(Tradepair).where(Tradepair.name == tradepair_name))
-        if not tradepair:
-            raise ValueError(f"Tradepair {tradepair_name} does not exist")
-        
-        timeframe_obj = session.scalar(select(Timeframe).where(Timeframe.name == timeframe))
-        if not timeframe_obj:
-            raise ValueError(f"Timeframe {timeframe} does not exist")
-        
-        # Fetch actual Candle objects from DB using the primary keys
-        candle_objects = session.scalars(
-            select(Candle).where(
-                (Candle.tradepair_name == tradepair_name) &
-                (Candle.timeframe_name == timeframe) &
-                (Candle.datetime_open.in_([c["datetime_open"] for c in candles]))
-            )
-        ).all()
-        
-        if len(candle_objects) != len(candles):
-            raise ValueError(f"Candles not found")
-
-        # Check if a swing already exists for this tradepair and these candles
-
-        existing_swing = session.scalar(
-            select(Swing)
-            .where(
-                (Swing.tradepair_name == tradepair_name),
-                (Swing.orientation_up == orientation_up),
-                (Swing.timeframe_name == timeframe)
-            ).where(
-                session.scalar(
-                    select(func.count(swing_candle_link.c.swing_id))
-                    .where(
-                        (swing_candle_link.c.candle_datetime_open.in_([c["datetime_open"] for c in candles])),
-                        (swing_candle_link.c.swing_id == Swing.id)  # Ensure link exists
-                    )
-                )
-                == len(candles)
-            )
-        )
+        if swings:
+            tradepair_names = {swing['tradepair_name'] for swing in swings}
+            missing = tradepair_names - set(session.scalars(
+                select(Tradepair.name).where(Tradepair.name.in_(tradepair_names))))
+            if missing:
+                raise ValueError(f"Tradepairs {', '.join(sorted(missing))} do not exist")
+
+            timeframe_names = {swing['timeframe_name'] for swing in swings}
+            missing = timeframe_names - set(session.scalars(
+                select(Timeframe.name).where(Timeframe.name.in_(timeframe_names))))
+            if missing:
+                raise ValueError(f"Timeframes {', '.join(sorted(missing))} do not exist")
+
+            identity = ('tradepair_name', 'timeframe_name', 'orientation_up', 'pivot_datetime_open')
+            candles = {tuple(swing[key] for key in identity): swing['candles'] for swing in swings}
+
+            stmt = insert(Swing).on_conflict_do_nothing(index_elements=identity).returning(Swing)
+            for start in range(0, len(swings), SWINGS_BATCH_SIZE):
+                new_swings += session.scalars(
+                    stmt, [{key: swing[key] for key in identity} for swing in swings[start:start + SWINGS_BATCH_SIZE]]
+                ).all()
+
+            if new_swings:
+                session.execute(insert(swing_candle_link), [
+                    {
+                        'swing_id': new_swing.id,
+                        'candle_tradepair': new_swing.tradepair_name,
+                        'candle_timeframe': new_swing.timeframe_name,
+                        'candle_datetime_open': datetime_open,
+                    }
+                    for new_swing in new_swings
+                    for datetime_open in candles[tuple(getattr(new_swing, key) for key in identity)]
+                ])
+                if notify:
+                    session.execute(insert(SwingNotification), [{'swing_id': new_swing.id} for new_swing in new_swings])
+
+        if watermarks:
+            upsertSwingWatermarks(session, watermarks)
+
+    return new_swings
+
+def claimSwingNotifications(limit: int, lease: timedelta) -> list[dict]:
+    """
+    Claim up to `limit` due swing notifications, oldest swings first.
+
+    Claimed notifications are not due again for `lease`, so concurrent
+    drainers skip them, and come back on their own if the claimer dies
+    before deleting or rescheduling them.
+
+    Returns
+    -------
+    list[dict]
+        The swings of the claimed notifications with the `attempts` made so far, this one
+        included, and the `age` of the notification in seconds.
+    """
+    due = (
+        select(SwingNotification.swing_id)
+        .where(SwingNotification.next_attempt <= func.localtimestamp())
+        .order_by(SwingNotification.swing_id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = (
+        update(SwingNotification)
+        .where(SwingNotification.swing_id.in_(due.scalar_subquery()))
+        .values(attempts=SwingNotification.attempts + 1, next_attempt=func.localtimestamp() + lease)
+        .returning(SwingNotification.swing_id, SwingNotification.attempts, SwingNotification.created_at)
+        .cte('claimed')
+    )
+    stmt = (
+        select(*tableColumns(Swing), claimed.c.attempts,
+               func.extract('epoch', func.localtimestamp() - claimed.c.created_at).label('age'))
+        .join(claimed, Swing.id == claimed.c.swing_id)
+        .order_by(Swing.id)
+    )
+    with getSession() as session:
+        return [dict(row._mapping) for row in session.execute(stmt)]
 
-        if not existing_swing:
+def deleteSwingNotifications(swing_ids: list[int]):
+    with getSession() as session:
+        session.execute(delete(SwingNotification).where(SwingNotification.swing_id.in_(swing_ids)))
+
+def rescheduleSwingNotifications(swing_ids: list[int], delay: timedelta):
+    with getSession() as session:
+        session.execute(
+            update(SwingNotification)
+            .where(SwingNotification.swing_id.in_(swing_ids))
+            .values(next_attempt=func.localtimestamp() + delay)
+        )
 
-            # Create the swing
-            new_swing = Swing(
-                tradepair_name=tradepair_name,
-                timeframe_name=timeframe,
-                orientation_up=orientation_up,
-                candles=candle_objects
-            )
-            session.add(new_swing)
-            
-    return new_swing
+def countSwingNotifications() -> int:
+    return selectRows(select(func.count().label('count')).select_from(SwingNotification))[0]['count']
 
 
 def addTimeframe(name, datetime_interval):
     with getSession() as session:
         session.add(Timeframe(name=name, datetime_interval=datetime_interval))
+
+def addTimeframes(timeframes: dict[str, timedelta]):
+    """Adds the timeframes missing from the database"""
+    with getSession() as session:
+        session.execute(
+            insert(Timeframe)
+            .values([{'name': name, 'datetime_interval': interval} for name, interval in timeframes.items()])
+            .on_conflict_do_nothing(index_elements=[Timeframe.name])
+        )
+
+@returnDict
+def selectBackfillCheckpoint(tradepair_name: str, timeframe: str) -> BackfillCheckpoint:
+    with getSession() as session:
+        return session.get(BackfillCheckpoint, (tradepair_name, timeframe))
+
+def setBackfillCheckpoint(tradepair_name: str, timeframe: str, datetime_open: datetime, completed: bool = False):
+    with getSession() as session:
+        stmt = insert(BackfillCheckpoint).values(
+            tradepair_name=tradepair_name, timeframe_name=timeframe,
+            datetime_open=datetime_open, completed=completed
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=BackfillCheckpoint.__table__.primary_key.columns,
+            set_={'datetime_open': stmt.excluded.datetime_open, 'completed': stmt.excluded.completed}
+        ))
+
+def deleteBackfillCheckpoints(tradepair_names: list[str], timeframe: str):
+    with getSession() as session:
+        session.execute(
+            delete(BackfillCheckpoint)
+            .where(BackfillCheckpoint.tradepair_name.in_(tradepair_names), BackfillCheckpoint.timeframe_name == timeframe)
+        )
+
+
+def heartbeatWorker(worker_id: str, ttl: timedelta) -> int:
+    """Record that a worker is alive, forget the ones silent for `ttl` and return the number of live workers"""
+    with getSession() as session:
+        stmt = insert(UpdaterWorker).values(id=worker_id, heartbeat=func.localtimestamp())
+        session.execute(stmt.on_conflict_do_update(index_elements=[UpdaterWorker.id], set_={'heartbeat': stmt.excluded.heartbeat}))
+        session.execute(delete(UpdaterWorker).where(UpdaterWorker.heartbeat < func.localtimestamp() - ttl))
+        return session.scalar(select(func.count()).select_from(UpdaterWorker))
+
+def deleteWorker(worker_id: str):
+    with getSession() as session:
+        session.execute(delete(ShardLease).where(ShardLease.worker_id == worker_id))
+        session.execute(delete(UpdaterWorker).where(UpdaterWorker.id == worker_id))
+
+def renewShardLeases(worker_id: str, ttl: timedelta) -> list[int]:
+    """Extend the unexpired leases of a worker by `ttl`, returns the shards it still holds"""
+    with getSession() as session:
+        return list(session.scalars(
+            update(ShardLease)
+            .where(ShardLease.worker_id == worker_id, ShardLease.expires_at > func.localtimestamp())
+            .values(expires_at=func.localtimestamp() + ttl)
+            .returning(ShardLease.shard)
+        ))
+
+def claimShards(worker_id: str, shards: int, count: int, ttl: timedelta) -> list[int]:
+    """
+    Lease up to `count` of the free shards among `range(shards)` for `ttl`.
+
+    A shard is free when it was never leased or its lease expired. Workers
+    racing for a shard are settled by the conflict on its primary key, the
+    lease only goes to the one seeing it expired, so fewer shards than
+    `count` may be returned.
+    """
+    leases = select(ShardLease.shard).where(ShardLease.expires_at > func.localtimestamp())
+    every_shard = select(func.generate_series(0, shards - 1).label('shard')).subquery()
+    candidates = (
+        select(every_shard.c.shard, literal(worker_id), func.localtimestamp() + ttl)
+        .where(every_shard.c.shard.not_in(leases))
+        .order_by(func.random())
+        .limit(count)
+    )
+    stmt = insert(ShardLease).from_select(['shard', 'worker_id', 'expires_at'], candidates)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ShardLease.shard],
+        set_={'worker_id': stmt.excluded.worker_id, 'expires_at': stmt.excluded.expires_at},
+        where=ShardLease.expires_at <= func.localtimestamp(),
+    ).returning(ShardLease.shard)
+    with getSession() as session:
+        return list(session.scalars(stmt))
+
+def releaseShards(worker_id: str, shards: list[int]):
+    with getSession() as session:
+        session.execute(delete(ShardLease).where(ShardLease.worker_id == worker_id, ShardLease.shard.in_(shards)))
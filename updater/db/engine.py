@@ -1,10 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy_utils import database_exists, create_database
+from sqlalchemy import create_engine, Engine
+from sqlalchemy.engine import make_url
 from updater.db.models import Base
+import threading
 import os
 
 from dotenv import load_dotenv
-load_dotenv() 
+load_dotenv()
 
 USER = os.getenv("DB_USER")
 PASSWORD = os.getenv("DB_PASSWORD")
@@ -12,9 +13,62 @@ HOST = os.getenv("DB_HOST")
 PORT = os.getenv("DB_PORT")
 DATABASE_NAME = os.getenv("DB_NAME")
 
-engine = create_engine(f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}")
-if not database_exists(engine.url):
-  create_database(engine.url)
-  
+#? a full url overrides the separate settings, e.g. to point benchmarks at a scratch database
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DATABASE_NAME}"
+
+#? connection pool, every process holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+#? test connections on checkout, dropped ones are replaced instead of failing the first query
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+#? compiled statements cached by sqlalchemy per engine
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", 500))
+#? psycopg prepares a statement server-side after this many executions on a connection, empty disables it
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "5")
+
+engine = None
+engine_lock = threading.Lock()
+
+
+def getEngine() -> Engine:
+  """
+  Engine of `DATABASE_URL`, created on first use.
+
+  Importing the db modules does not connect, the pool opens connections
+  as queries need them. The database itself is created by `createDatabase()`.
+  """
+  global engine
+  if engine is None:
+    with engine_lock:
+      if engine is None:
+        engine = create_engine(DATABASE_URL, **engineOptions(DATABASE_URL))
+  return engine
+
+def engineOptions(url: str) -> dict:
+  options = {
+    'pool_size': DB_POOL_SIZE,
+    'max_overflow': DB_MAX_OVERFLOW,
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'pool_recycle': DB_POOL_RECYCLE,
+    'pool_pre_ping': DB_POOL_PRE_PING,
+    'query_cache_size': DB_QUERY_CACHE_SIZE,
+  }
+  if make_url(url).get_driver_name() == 'psycopg':
+    options['connect_args'] = {'prepare_threshold': int(DB_PREPARE_THRESHOLD) if DB_PREPARE_THRESHOLD else None}
+  return options
+
+def createDatabase() -> bool:
+  """Create the database of `DATABASE_URL` and its missing tables, returns whether the database was created"""
+  from sqlalchemy_utils import database_exists, create_database
+
+  url = getEngine().url
+  created = not database_exists(url)
+  if created:
+    create_database(url)
+  Base.metadata.create_all(getEngine())
+  return created
+
 if __name__ == "__main__":
-  Base.metadata.create_all(engine)
\ No newline at end of file
+  createDatabase()
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, DateTime, Table, Column, Float, Boolean, ForeignKeyConstraint, Interval, Integer
+from sqlalchemy import String, ForeignKey, DateTime, Table, Column, Float, Boolean, ForeignKeyConstraint, Interval, Integer, Index, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, validates
 from datetime import datetime, timedelta
 from typing import List
@@ -46,6 +46,11 @@ class Candle (Base, SerializerMixin):
   timeframe: Mapped["Timeframe"] = relationship("Timeframe", back_populates="candles")
   swings: Mapped[List["Swing"]] = relationship("Swing", secondary="swing_candle_link", back_populates="candles")
 
+  __table_args__ = (
+    #? covers crud.selectCandleSeries, swing detection reads the series without touching the heap
+    Index("ix_candle_series_extremes", "tradepair_name", "timeframe_name", "datetime_open", postgresql_include=["high", "low"]),
+  )
+
 swing_candle_link = Table(
   "swing_candle_link", Base.metadata,
   Column("swing_id", ForeignKey("swing.id"), primary_key=True),
@@ -55,7 +60,9 @@ swing_candle_link = Table(
   ForeignKeyConstraint(
     ["candle_tradepair", "candle_timeframe", "candle_datetime_open"],
     ["candle.tradepair_name", "candle.timeframe_name", "candle.datetime_open"]
-  )
+  ),
+  #? the primary key leads with swing_id, lookups from a candle need their own index
+  Index("ix_swing_candle_link_candle", "candle_tradepair", "candle_timeframe", "candle_datetime_open"),
 )
   
 class Swing(Base, SerializerMixin):
@@ -64,8 +71,64 @@ class Swing(Base, SerializerMixin):
   tradepair_name: Mapped[str] = mapped_column(ForeignKey("tradepair.name"), nullable=False)
   timeframe_name: Mapped[str] = mapped_column(ForeignKey("timeframe.name"), nullable=False)
   orientation_up: Mapped[bool] = mapped_column(Boolean, nullable=False)
+  #? open datetime of the middle candle, together with the series and orientation identifies a swing
+  pivot_datetime_open: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     
   tradepair: Mapped["Tradepair"] = relationship("Tradepair", back_populates="swings")
   timeframe: Mapped["Timeframe"] = relationship("Timeframe", back_populates="swings")
   
   candles: Mapped[List["Candle"]] = relationship("Candle", secondary="swing_candle_link", back_populates="swings")
+
+  __table_args__ = (
+    Index("ix_swing_identity", "tradepair_name", "timeframe_name", "orientation_up", "pivot_datetime_open", unique=True),
+    #? latest swings of a series, see crud.selectSwings
+    Index("ix_swing_series_id", "tradepair_name", "timeframe_name", "id"),
+  )
+
+
+class SwingNotification(Base, SerializerMixin):
+  """Outbox of the swings not delivered to the bot yet, written in the transaction adding the swings"""
+  __tablename__ = "swing_notification"
+  #? one notification per swing, the swing id is also the idempotency key the bot dedupes on
+  swing_id: Mapped[int] = mapped_column(ForeignKey("swing.id", ondelete="CASCADE"), primary_key=True)
+  attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+  #? the notification is not claimed before this, moved forward while it is delivered and after failures
+  next_attempt: Mapped[datetime] = mapped_column(DateTime, server_default=func.localtimestamp(), nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.localtimestamp(), nullable=False)
+
+  __table_args__ = (
+    Index("ix_swing_notification_next_attempt", "next_attempt"),
+  )
+
+
+class SwingWatermark(Base, SerializerMixin):
+  """Open datetime of the latest candle already scanned for swings in a series"""
+  __tablename__ = "swing_watermark"
+  tradepair_name: Mapped[str] = mapped_column(ForeignKey("tradepair.name"), primary_key=True)
+  timeframe_name: Mapped[str] = mapped_column(ForeignKey("timeframe.name"), primary_key=True)
+  datetime_open: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class UpdaterWorker(Base, SerializerMixin):
+  """Live `manager.py start worker` processes, the shards are split between them"""
+  __tablename__ = "updater_worker"
+  id: Mapped[str] = mapped_column(String(100), primary_key=True)
+  heartbeat: Mapped[datetime] = mapped_column(DateTime, server_default=func.localtimestamp(), nullable=False)
+
+
+class ShardLease(Base, SerializerMixin):
+  """Tradepair shard claimed by a worker, free again once `expires_at` has passed"""
+  __tablename__ = "shard_lease"
+  shard: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+  worker_id: Mapped[str] = mapped_column(String(100), nullable=False)
+  expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class BackfillCheckpoint(Base, SerializerMixin):
+  """Progress of the historical backfill of a series"""
+  __tablename__ = "backfill_checkpoint"
+  tradepair_name: Mapped[str] = mapped_column(ForeignKey("tradepair.name"), primary_key=True)
+  timeframe_name: Mapped[str] = mapped_column(ForeignKey("timeframe.name"), primary_key=True)
+  #? open datetime of the next candle to fetch
+  datetime_open: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+  completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
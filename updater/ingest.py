@@ -0,0 +1,121 @@
+"""
+Fetching of the latest tradepairs and candles from Binance into the database,
+shared by the updater server and the `manager.py parse` commands.
+"""
+import math
+import time
+import logging
+from collections import defaultdict
+
+from updater.api import binance
+from updater.db import crud
+from updater import resample, metrics
+from updater.candles import CandleBatch
+from updater.config import TIMEFRAMES
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+))
+logger.addHandler(console_handler)
+
+
+def parseNewTradepairs() -> tuple[list[dict], list[dict]]:
+    """Store the USDT tradepairs listed on Binance, returns the added and the delisted ones"""
+    logger.info("Fetching tradepairs...")
+    tradepairs = binance.getTradepairs()
+    logger.debug(f"Fetched {len(tradepairs)} tradepairs")
+    logger.info("Uploading tradepairs to db...")
+    added_tradepairs, delisted_tradepairs = crud.addTradepairs(tradepairs=tradepairs)
+    logger.debug(f"Added {len(added_tradepairs)} tradepairs, {len(delisted_tradepairs)} delisted")
+    return added_tradepairs, delisted_tradepairs
+
+def missedCandles(timeframe: str, tradepair_names: list[str]) -> dict[str, int]:
+    """
+    Number of `timeframe` candles to fetch for each tradepair to catch up
+    from its own latest stored candle, at least `binance.CANDLES_LIMIT`.
+    Tradepairs without candles get `binance.CANDLES_LIMIT`, their history
+    is left to the backfill.
+    """
+    latest = crud.selectLatestCandleOpens(timeframe, tradepair_names)
+    interval = binance.INTERVALS[timeframe].total_seconds()
+    now = time.time()
+
+    missed = {}
+    for tradepair_name in tradepair_names:
+        count = binance.CANDLES_LIMIT
+        if tradepair_name in latest:
+            #? candles opened after the latest stored one that have closed since
+            count = max(math.floor((now - latest[tradepair_name].timestamp()) / interval) - 1, count)
+        missed[tradepair_name] = count
+
+    behind = [name for name, count in missed.items() if count > binance.MAX_CANDLES_LIMIT]
+    if behind:
+        logger.warning(f"{len(behind)} tradepairs missed more {timeframe} candles than a request returns, backfill them: {', '.join(behind)}")
+    return missed
+
+def fetchMissedCandles(timeframe: str, tradepair_names: list[str], extra: int = 0) -> CandleBatch:
+    """
+    Fetch the `missedCandles()` of every tradepair plus `extra` ones, in one
+    `binance.getCandles()` call per limit so each tradepair pays the request
+    weight of its own gap only.
+    """
+    groups = defaultdict(list)
+    for tradepair_name, count in missedCandles(timeframe, tradepair_names).items():
+        groups[min(count + extra, binance.MAX_CANDLES_LIMIT)].append(tradepair_name)
+    return CandleBatch.concat([
+        binance.getCandles(names, interval=timeframe, limit=limit) for limit, names in sorted(groups.items())
+    ])
+
+def parseNewCandles(timeframes: list[str] = None, tradepair_names: list[str] = None) -> CandleBatch:
+    """
+    Fetch fresh candles for every tracked tradepair and store them.
+    Only the lowest configured timeframe (and the ones not divisible by it)
+    is fetched, higher timeframes are resampled from it.
+    `timeframes` limits the update to some of the configured timeframes,
+    a derived timeframe needs its base timeframe selected too.
+    `tradepair_names` limits it to some of the tracked tradepairs, e.g. the shard of a worker.
+    """
+    selected = set(timeframes or TIMEFRAMES)
+    fetched, derived = resample.planTimeframes(TIMEFRAMES)
+    fetched = [timeframe for timeframe in fetched if timeframe in selected]
+    derived = {name: base for name, base in derived.items() if name in selected and base in selected}
+    crud.addTimeframes({name: binance.INTERVALS[name] for name in TIMEFRAMES})
+
+    logger.info("Loading tradepairs...")
+    tradepairs = crud.selectTradepairs(tracking=True)
+    selected_tradepairs = set(tradepair_names) if tradepair_names is not None else None
+    tradepair_names = [tp['name'] for tp in tradepairs if selected_tradepairs is None or tp['name'] in selected_tradepairs]
+    logger.info(f"{len(tradepair_names)} tradepairs loaded. Fetching candles...")
+
+    added_candles = []
+    for timeframe in fetched:
+        #? the base timeframe has to cover at least one candle of every timeframe derived from it
+        spans = [binance.INTERVALS[name] // binance.INTERVALS[timeframe]
+                 for name, base in derived.items() if base == timeframe]
+
+        with metrics.update_stage_seconds.labels('fetch').time():
+            candles = fetchMissedCandles(timeframe, tradepair_names, extra=max(spans, default=0))
+        logger.info(f"Adding {timeframe} candles to the DB")
+        with metrics.update_stage_seconds.labels('insert').time():
+            added = crud.addCandles(candles)
+        added_candles.append(added)
+
+        for name, base in derived.items():
+            if base == timeframe:
+                logger.info(f"Resampling {timeframe} candles to {name}")
+                with metrics.update_stage_seconds.labels('resample').time():
+                    added_candles.append(crud.addCandles(resample.resampleNewCandles(added, name)))
+
+    added_candles = CandleBatch.concat(added_candles)
+    if (len(added_candles) != 0):
+        logger.info(f"Added {len(added_candles)} candles")
+    else:
+        logger.info("No new candles")
+    return added_candles
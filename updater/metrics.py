@@ -0,0 +1,47 @@
+"""
+Prometheus metrics of the updater, served on `/metrics` by the updater
+server and on `METRICS_PORT` by the stream and worker processes.
+
+Every process keeps its own values, scrape each of them.
+"""
+from prometheus_client import Histogram, Counter, Gauge, start_http_server
+
+from updater.config import METRICS_PORT
+
+#? seconds, from a fast local request to a backfill page under rate limiting
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+ROWS_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 20000, 100000, 500000)
+
+binance_request_seconds = Histogram(
+    "overseer_binance_request_seconds", "Binance REST request latency", ["endpoint"], buckets=LATENCY_BUCKETS)
+binance_weight_spent = Counter(
+    "overseer_binance_weight_spent", "Request weight spent on Binance", ["endpoint"])
+binance_used_weight = Gauge(
+    "overseer_binance_used_weight", "Used weight of the current window, as reported by Binance")
+binance_rate_limited = Counter(
+    "overseer_binance_rate_limited", "Binance responses refusing a request, 429 (rate limit) and 418 (ban)", ["status"])
+
+candles_inserted_rows = Histogram(
+    "overseer_candles_inserted_rows", "Candles inserted per crud.addCandles() batch", ["method"], buckets=ROWS_BUCKETS)
+swing_detection_seconds = Histogram(
+    "overseer_swing_detection_seconds", "Swing detection time of one series", ["timeframe"], buckets=LATENCY_BUCKETS)
+swing_notification_seconds = Histogram(
+    "overseer_swing_notification_seconds", "Delay from a swing being stored to the bot accepting it", buckets=LATENCY_BUCKETS)
+swing_notification_failures = Counter(
+    "overseer_swing_notification_failures", "Swing batches the bot could not be reached for")
+
+update_stage_seconds = Histogram(
+    "overseer_update_stage_seconds", "Duration of the stages of an update run", ["stage"], buckets=LATENCY_BUCKETS)
+update_run_seconds = Histogram(
+    "overseer_update_run_seconds", "Duration of whole update runs, failed ones included", buckets=LATENCY_BUCKETS)
+update_failures = Counter(
+    "overseer_update_failures", "Update runs stopped by a failed candle fetch")
+
+http_request_seconds = Histogram(
+    "overseer_http_request_seconds", "Updater API latency per route", ["route", "method", "status"], buckets=LATENCY_BUCKETS)
+
+
+def startMetricsServer():
+    """Serve the metrics of a process without the flask app, when `METRICS_PORT` is set"""
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT, addr="127.0.0.1")
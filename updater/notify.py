@@ -0,0 +1,123 @@
+"""
+Delivery of new swings to the bot through the `swing_notification` outbox.
+
+`crud.addSwings()` queues a notification per new swing in the transaction
+adding it, a background drainer claims the due ones in batches and posts
+them to the bot. Failed batches are retried with an exponential backoff,
+so the bot being slow or down never blocks or rolls back the ingestion.
+Every swing carries its id, the bot drops the ones it already received.
+"""
+import time
+import random
+import logging
+import threading
+from datetime import timedelta
+
+from updater.db import crud
+from updater import metrics
+from updater.config import BOT_SERVER_URL, NOTIFY_BATCH_SIZE, NOTIFY_POLL_INTERVAL
+from utils.http import getHttpSession
+
+if not BOT_SERVER_URL:
+    raise AttributeError("Bot URL not found. Check .env file.")
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+))
+logger.addHandler(console_handler)
+
+#? seconds before a failed batch is retried, doubled on every attempt
+RETRY_MIN_DELAY = 2
+RETRY_MAX_DELAY = 600
+#? claimed notifications are retried after this if their delivery never finished, longer than the http timeouts
+DELIVERY_LEASE = timedelta(minutes=2)
+
+wakeup = threading.Event()
+drainer = None
+drainer_lock = threading.Lock()
+
+
+def swingPayload(swing: dict) -> dict:
+    return {
+        "id": swing['id'],
+        "tradepair": swing['tradepair_name'],
+        "timeframe": swing['timeframe_name'],
+        "swing_type": "high" if swing['orientation_up'] else "low",
+    }
+
+def postSwings(swings: list[dict]):
+    """Post swings to the bot, raises on connection errors and error responses"""
+    response = getHttpSession(BOT_SERVER_URL).post(
+        f"http://{BOT_SERVER_URL}/swing-updates", json=[swingPayload(swing) for swing in swings]
+    )
+    response.raise_for_status()
+
+def retryDelay(attempts: int) -> timedelta:
+    delay = min(RETRY_MIN_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+def deliverSwingNotifications(limit: int = NOTIFY_BATCH_SIZE) -> int:
+    """
+    Claim a batch of due notifications and post them to the bot.
+
+    Delivered notifications are deleted, the batch is rescheduled with a
+    backoff on failure.
+
+    Returns
+    -------
+    int
+        Number of swings delivered, 0 when none was due or the delivery failed.
+    """
+    swings = crud.claimSwingNotifications(limit, DELIVERY_LEASE)
+    if not swings:
+        return 0
+
+    swing_ids = [swing['id'] for swing in swings]
+    started = time.perf_counter()
+    try:
+        postSwings(swings)
+    except Exception as err:
+        metrics.swing_notification_failures.inc()
+        delay = retryDelay(max(swing['attempts'] for swing in swings))
+        crud.rescheduleSwingNotifications(swing_ids, delay)
+        logger.warning(f"Could not send {len(swings)} swings to the bot ({err}), retrying in {delay.total_seconds():.0f} seconds")
+        return 0
+
+    elapsed = time.perf_counter() - started
+    for swing in swings:
+        metrics.swing_notification_seconds.observe(float(swing['age']) + elapsed)
+    crud.deleteSwingNotifications(swing_ids)
+    logger.info(f"Sent {len(swings)} swings to the bot")
+    return len(swings)
+
+def notifySwings():
+    """Wake the drainer up, e.g. once new swings were added"""
+    wakeup.set()
+
+def drainSwingNotifications():
+    """Deliver due notifications when woken up or every `NOTIFY_POLL_INTERVAL` seconds"""
+    while True:
+        wakeup.wait(NOTIFY_POLL_INTERVAL)
+        wakeup.clear()
+        try:
+            #? full batches mean more notifications are probably due
+            while deliverSwingNotifications() == NOTIFY_BATCH_SIZE:
+                pass
+        except Exception as err:
+            logger.error(f"Could not drain swing notifications: {err}")
+
+def startNotifier():
+    """Start the drainer of this process, once"""
+    global drainer
+    with drainer_lock:
+        if drainer is None:
+            drainer = threading.Thread(target=drainSwingNotifications, daemon=True)
+            drainer.start()
+    notifySwings()
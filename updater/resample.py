@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import numpy as np
+
+from updater.api import binance
+from updater.candles import CandleBatch, localDatetimes, epochSeconds
+from updater.db import crud
+
+#? the unix epoch is a thursday, binance weeks start on monday
+WEEK_ANCHOR = timedelta(days=4)
+
+
+def bucketStarts(epochs: np.ndarray, interval: timedelta) -> np.ndarray:
+    """
+    Open time (unix seconds) of the `interval` candle containing each of `epochs`.
+
+    Buckets are aligned the way Binance aligns klines requested with
+    `timeZone=binance.TIMEZONE_OFFSET`, weeks start on monday.
+    """
+    length = interval.total_seconds()
+    anchor = WEEK_ANCHOR.total_seconds() if interval == timedelta(weeks=1) else 0
+    shift = binance.TIMEZONE_OFFSET * 3600 - anchor
+    return np.floor((epochs + shift) / length) * length - shift
+
+def planTimeframes(timeframes: list[str]) -> tuple[list[str], dict[str, str]]:
+    """
+    Split timeframes into the ones fetched from Binance and the ones built locally.
+
+    The lowest timeframe is always fetched, every timeframe whose interval
+    is a multiple of it is resampled from it.
+
+    Returns
+    -------
+    tuple[list[str], dict[str, str]]
+        Fetched timeframes and a map of derived timeframe to its base timeframe.
+    """
+    unknown = [name for name in timeframes if name not in binance.INTERVALS]
+    if unknown:
+        raise ValueError(f"Unsupported timeframes: {', '.join(unknown)}")
+
+    ordered = sorted(set(timeframes), key=lambda name: binance.INTERVALS[name])
+    base = ordered[0]
+    fetched, derived = [base], {}
+    for name in ordered[1:]:
+        if binance.INTERVALS[name] % binance.INTERVALS[base]:
+            fetched.append(name)
+        else:
+            derived[name] = base
+    return fetched, derived
+
+def resampleCandles(candles: CandleBatch, timeframe_name: str, from_listing: bool = False) -> CandleBatch:
+    """
+    Aggregate chronologically ordered candles of one series into `timeframe_name` candles.
+
+    A candle is built only when the base candles cover both ends of its
+    interval, the last one may not be closed yet and the first one may have
+    been cut by the start of the loaded range. With `from_listing` the series
+    starts at the tradepair listing, so its first candle is built from
+    whatever part of the interval was traded, the way Binance does.
+
+    Parameters
+    ----------
+    candles : CandleBatch
+        Candles of a single tradepair and base timeframe, oldest first.
+    timeframe_name : str
+        Target timeframe, a multiple of the base one.
+    from_listing : bool
+        Whether `candles` start at the first candle of the tradepair.
+
+    Returns
+    -------
+    CandleBatch
+        Complete candles of the target timeframe.
+    """
+    if not len(candles):
+        return CandleBatch.empty()
+
+    base = binance.INTERVALS[candles.timeframe_name[0]]
+    interval = binance.INTERVALS[timeframe_name]
+
+    opens = epochSeconds(candles.datetime_open)
+
+    starts = bucketStarts(opens, interval)
+    firsts = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    lasts = np.concatenate((firsts[1:], [len(candles)])) - 1
+
+    complete = opens[lasts] == starts[firsts] + (interval - base).total_seconds()
+    complete &= opens[firsts] == starts[firsts]
+    if from_listing:
+        complete[0] = opens[lasts[0]] == starts[0] + (interval - base).total_seconds()
+
+    firsts, lasts, highs, lows = (
+        firsts[complete], lasts[complete],
+        np.maximum.reduceat(candles.high, firsts)[complete], np.minimum.reduceat(candles.low, firsts)[complete],
+    )
+    starts_ms = np.round(starts[firsts] * 1000).astype(np.int64)
+    interval_ms = int(interval.total_seconds() * 1000)
+    return CandleBatch.fromSeries(candles.tradepair_name[0], timeframe_name, {
+        'datetime_open': localDatetimes(starts_ms),
+        #? binance closes a kline a millisecond before the next one opens, converted on its own since
+        #? a DST change inside the candle shifts the local close but not the open
+        'datetime_close': localDatetimes(starts_ms + interval_ms - 1),
+        'open': candles.open[firsts],
+        'high': highs,
+        'low': lows,
+        'close': candles.close[lasts],
+    })
+
+def resampleNewCandles(added_candles: CandleBatch, timeframe_name: str, from_listing: bool = False) -> CandleBatch:
+    """
+    Build the `timeframe_name` candles affected by freshly added base candles.
+
+    For every tradepair the base series is reloaded from the start of the
+    target candle holding its earliest new base candle, so candles spanning
+    several updates are built from the complete stored series.
+    `from_listing` is passed to `resampleCandles()`.
+    """
+    interval = binance.INTERVALS[timeframe_name]
+    resampled = []
+    for (tradepair_name, base), candles in added_candles.series():
+        since = localDatetimes(bucketStarts(epochSeconds(candles.datetime_open[:1]), interval) * 1000)[0].item()
+        columns = crud.selectCandleColumns(tradepair_name, base, since=since, oldest_first=True)
+        series = CandleBatch.fromSeries(tradepair_name, base, columns)
+        resampled.append(resampleCandles(series, timeframe_name, from_listing=from_listing))
+    return CandleBatch.concat(resampled)
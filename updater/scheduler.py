@@ -0,0 +1,91 @@
+"""
+Updates scheduled on the candle closes of the configured timeframes.
+
+The next close of every timeframe is computed from its interval, aligned
+like Binance aligns its klines (see `resample.bucketStarts()`), and the
+scheduler sleeps until the earliest one. Each close runs the update of
+the timeframes closing at that instant only, runs of different timeframes
+proceed concurrently.
+"""
+import time
+import logging
+import threading
+from datetime import datetime
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from updater.api import binance
+from updater import resample
+from updater.config import TIMEFRAMES, UPDATE_SETTLE_DELAY
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+))
+logger.addHandler(console_handler)
+
+#? longest single sleep, the wall clock is checked again after it in case it jumped (suspend, ntp)
+MAX_SLEEP = 300
+
+
+def nextClose(timeframe: str, now: float) -> float:
+    """Close time (unix seconds) of the `timeframe` candle open at `now`, always after `now`"""
+    interval = binance.INTERVALS[timeframe]
+    return resample.bucketStarts(np.array([now]), interval)[0].item() + interval.total_seconds()
+
+def nextCloses(timeframes: list[str], now: float) -> tuple[float, list[str]]:
+    """Earliest close after `now` among `timeframes` and the timeframes closing then"""
+    closes = {timeframe: nextClose(timeframe, now) for timeframe in timeframes}
+    close = min(closes.values())
+    return close, [timeframe for timeframe in timeframes if closes[timeframe] == close]
+
+def sleepUntil(timestamp: float):
+    while (delay := timestamp - time.time()) > 0:
+        time.sleep(min(delay, MAX_SLEEP))
+
+def runLocked(run: Callable[[list[str]], None], timeframes: list[str], locks: dict[str, threading.Lock]):
+    #? a run still busy with one of the timeframes is waited for, locks are taken in a fixed order
+    for timeframe in sorted(timeframes):
+        locks[timeframe].acquire()
+    try:
+        run(timeframes)
+    except Exception as err:
+        logger.error(f"Update of {', '.join(timeframes)} failed: {err}")
+    finally:
+        for timeframe in timeframes:
+            locks[timeframe].release()
+
+def runAtCandleCloses(run: Callable[[list[str]], None], timeframes: list[str] = None,
+                      settle_delay: float = UPDATE_SETTLE_DELAY):
+    """
+    Call `run(closing_timeframes)` `settle_delay` seconds after every candle close, forever.
+
+    Parameters
+    ----------
+    run : Callable[[list[str]], None]
+        Update of the given timeframes, called from a worker thread.
+    timeframes : list[str], optional
+        Scheduled timeframes, `TIMEFRAMES` by default.
+    settle_delay : float
+        Seconds waited after a close before running.
+    """
+    timeframes = timeframes or TIMEFRAMES
+    locks = {timeframe: threading.Lock() for timeframe in timeframes}
+    executor = ThreadPoolExecutor(max_workers=len(timeframes), thread_name_prefix="update")
+
+    now = time.time()
+    while True:
+        close, closing = nextCloses(timeframes, now)
+        logger.info(f"Next update of {', '.join(closing)} at {datetime.fromtimestamp(close + settle_delay)}")
+        sleepUntil(close + settle_delay)
+        executor.submit(runLocked, run, closing, locks)
+        #? closes missed while the process was asleep are not run again, runs fetch every candle missed since the stored ones
+        now = max(close, time.time() - settle_delay)
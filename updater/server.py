@@ -1,12 +1,18 @@
-from updater.api import binance
-from updater.db import crud
-from updater.config import BOT_SERVER_URL
+from updater.api import binance, stream
+from updater.db import crud, cache
+from updater import swings, resample, notify, scheduler, metrics
+from updater.ingest import parseNewTradepairs, parseNewCandles
+from updater.candles import CandleBatch
+from updater.config import TIMEFRAMES, SCHEDULE_UPDATES
 
-import schedule
 import time
+import math
+import queue
 import threading
 import logging
 import json
+from collections import defaultdict
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,56 +29,177 @@ formatter = logging.Formatter(
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
+#? candles of every tradepair close at the same instant, they are collected until none arrived for
+#? `STREAM_BATCH_IDLE` seconds or for at most `STREAM_BATCH_DELAY` seconds before being processed
+STREAM_BATCH_IDLE = 0.2
+STREAM_BATCH_DELAY = 1
+#? seconds between reloads of the streamed tradepairs
+STREAM_REFRESH_INTERVAL = 60
 
-def parseNewTradepairs():
-    """Parse new tradepairs"""
-    
-    logger.info("Fetching tradepairs...")
-    tradepairs = binance.getTradepairs()
-    logger.debug(f"Fetched {len(tradepairs)} tradepairs")
-    logger.info("Uploading tradepairs to db...")
-    added_tradepairs = crud.addTradepairs(tradepairs=tradepairs)
-    logger.debug(f"Added {len(added_tradepairs)} tradepairs")
-    return jsonify({'added_tradepairs': added_tradepairs})
-    
-def parseNewCandles():
-    logger.info("Loading tradepairs...")
-    tradepairs = crud.selectTradepairs(tracking=True)
-    tradepairs = list(map(lambda x: x['name'], tradepairs))
-    print(f"{len(tradepairs)} tradepairs loaded. Fetching candles...")
-    
-    try:
-        candles = binance.getCandles(tradepairs)
-    except RuntimeError as err:
-        logger.error(err)
-    else:
-        logger.info("Adding candles to the DB")
-        added_candles = crud.addCandles(candles)
-        if (len(added_candles) != 0):
-            logger.info(f"Added {len(added_candles)} candles")
-        else:
-            logger.info("No new candles")
+#? GET /candles page sizes, NDJSON responses are read from the db in pages of `CANDLES_STREAM_PAGE_SIZE`
+CANDLES_DEFAULT_LIMIT = 500
+CANDLES_MAX_LIMIT = 5000
+CANDLES_STREAM_PAGE_SIZE = 1000
+SWINGS_DEFAULT_LIMIT = 500
+SWINGS_MAX_LIMIT = 5000
 
 
-from flask import Flask, jsonify, request, Response
-import requests
+from flask import Flask, jsonify, request, Response, stream_with_context, g
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from utils import columnar
+
+#? response formats, the first acceptable one is picked
+SWING_MIMETYPES = ['application/json', columnar.COLUMNS_MIMETYPE] + ([columnar.ARROW_MIMETYPE] if columnar.pyarrow else [])
+CANDLE_MIMETYPES = SWING_MIMETYPES[:1] + ['application/x-ndjson'] + SWING_MIMETYPES[1:]
 
 app = Flask(__name__)
 
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_latency(response):
+    #? streamed responses are timed up to their first byte
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.http_request_seconds.labels(route, request.method, response.status_code).observe(
+        time.perf_counter() - g.request_started)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
 @app.route('/tradepairs', methods=['GET'])
 def get_tradepairs():
     tracking = request.args.get('tracking', type = bool)
     tradepairs = crud.selectTradepairs(tracking)
     return jsonify({'tradepairs': tradepairs})
 
+@app.route('/tradepairs/summary', methods=['GET'])
+def get_tradepairs_summary():
+    """Tradepair counts, so clients do not download the whole list to count it"""
+    summary = crud.countTradepairs()
+    summary['untracking'] = summary['total'] - summary['tracking']
+    return jsonify(summary)
+
+def parseDatetimeArg(name: str) -> datetime | None:
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def parseLimitArg(maximum: int = None) -> int | None:
+    value = request.args.get('limit')
+    if not value:
+        return None
+    limit = int(value)
+    if limit < 1 or (maximum and limit > maximum):
+        raise ValueError(f"Invalid limit {limit}")
+    return limit
+
+def negotiateMimetype(offered: list[str]) -> str | None:
+    """Best of the `offered` response formats for the `Accept` header, the first one without it"""
+    if not request.accept_mimetypes:
+        return offered[0]
+    return request.accept_mimetypes.best_match(offered)
+
+def candlePages(limit: int = None, after: datetime = None, **filters):
+    """Columns of the selected candles, read from the db page by page with a keyset cursor"""
+    sent = 0
+    while limit is None or sent < limit:
+        page_size = CANDLES_STREAM_PAGE_SIZE if limit is None else min(CANDLES_STREAM_PAGE_SIZE, limit - sent)
+        columns = crud.selectCandleColumns(after=after, limit=page_size, **filters)
+        rows = len(columns['datetime_open'])
+        #? the first page is sent even when empty, binary formats take their schema from it
+        if rows or not sent:
+            yield columns
+        if rows < page_size:
+            return
+        sent += rows
+        after = columns['datetime_open'][-1].item()
+
+def encodeStream(mimetype: str, pages, metadata: dict, toRows):
+    """Chunks of `pages` of columns in the negotiated format, `toRows` turns a page into dicts for NDJSON"""
+    match mimetype:
+        case columnar.COLUMNS_MIMETYPE:
+            return columnar.columnChunks(pages, metadata)
+        case columnar.ARROW_MIMETYPE:
+            return columnar.arrowChunks(pages, metadata)
+        case _:
+            return (''.join(app.json.dumps(row) + '\n' for row in toRows(page)) for page in pages)
+
 @app.route('/candles', methods=["GET"])
 def get_candles():
+    """
+    Candles of a tradepair and timeframe, newest first unless `order=asc`.
+
+    `since` and `until` (ISO 8601, `until` excluded) select a range. Pages of
+    at most `limit` candles are chained by passing the `next_cursor` of a
+    page as `cursor`. NDJSON, packed numpy columns and Arrow IPC (with
+    pyarrow installed) are negotiated with the `Accept` header, they stream
+    the whole range (or `limit` candles).
+    """
     tradepair_name = request.args.get('tradepair_name', type=str)
     timeframe = request.args.get('timeframe', type=str)
-    if timeframe and tradepair_name:
-        candles = crud.selectCandles(tradepair_name, timeframe)
-        return jsonify({'candles': candles})
-    return Response('Invalid parameters', status=422)
+    order = request.args.get('order', 'desc')
+    mimetype = negotiateMimetype(CANDLE_MIMETYPES)
+    if mimetype is None:
+        return Response('Not acceptable', status=406)
+
+    streamed = mimetype != 'application/json'
+    try:
+        since = parseDatetimeArg('since')
+        until = parseDatetimeArg('until')
+        cursor = parseDatetimeArg('cursor')
+        limit = parseLimitArg(maximum=None if streamed else CANDLES_MAX_LIMIT)
+    except ValueError:
+        return Response('Invalid parameters', status=422)
+    if not (timeframe and tradepair_name) or order not in ('asc', 'desc'):
+        return Response('Invalid parameters', status=422)
+
+    filters = {'tradepair_name': tradepair_name, 'timeframe': timeframe, 'since': since, 'until': until,
+               'oldest_first': order == 'asc'}
+    if streamed:
+        pages = candlePages(limit, cursor, **filters)
+        metadata = {'tradepair_name': tradepair_name, 'timeframe': timeframe}
+        toRows = lambda columns: cache.toCandles(tradepair_name, timeframe, columns)
+        return Response(stream_with_context(encodeStream(mimetype, pages, metadata, toRows)), mimetype=mimetype)
+
+    limit = limit or CANDLES_DEFAULT_LIMIT
+    candles = crud.selectCandles(after=cursor, limit=limit, **filters)
+    next_cursor = candles[-1]['datetime_open'].isoformat() if len(candles) == limit else None
+    return jsonify({'candles': candles, 'next_cursor': next_cursor})
+
+@app.route('/swings', methods=["GET"])
+def get_swings():
+    """
+    Swings of a tradepair and timeframe, newest first.
+
+    Pages of at most `limit` swings are chained by passing the `next_cursor`
+    of a page as `cursor`. Binary formats are negotiated like for /candles,
+    their metadata carries the `next_cursor`.
+    """
+    tradepair_name = request.args.get('tradepair_name', type=str)
+    timeframe = request.args.get('timeframe', type=str)
+    mimetype = negotiateMimetype(SWING_MIMETYPES)
+    if mimetype is None:
+        return Response('Not acceptable', status=406)
+    try:
+        limit = parseLimitArg(maximum=SWINGS_MAX_LIMIT) or SWINGS_DEFAULT_LIMIT
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return Response('Invalid parameters', status=422)
+    if not (timeframe and tradepair_name):
+        return Response('Invalid parameters', status=422)
+
+    if mimetype == 'application/json':
+        swings = crud.selectSwings(tradepair_name, timeframe, amount=limit, before_id=cursor)
+        next_cursor = swings[-1]['id'] if len(swings) == limit else None
+        return jsonify({'swings': swings, 'next_cursor': next_cursor})
+
+    columns = crud.selectSwingColumns(tradepair_name, timeframe, amount=limit, before_id=cursor)
+    next_cursor = columns['id'][-1].item() if len(columns['id']) == limit else None
+    metadata = {'tradepair_name': tradepair_name, 'timeframe': timeframe, 'next_cursor': next_cursor}
+    return Response(b''.join(encodeStream(mimetype, [columns], metadata, None)), mimetype=mimetype)
 
 @app.route('/tradepairs/status', methods=["PUT"])
 def switch_tradepairs_status():
@@ -89,118 +216,210 @@ def switch_tradepairs_status():
 
 @app.route('/tradepairs/update', methods=['POST'])
 def fetch_new_tradepairs():
-    logger.info("Fetching tradepairs...")
-    tradepairs = binance.getTradepairs()
-    logger.debug(f"Fetched {len(tradepairs)} tradepairs")
-    logger.info("Uploading tradepairs to db...")
-    added_tradepairs = crud.addTradepairs(tradepairs=tradepairs)
-    logger.debug(f"Added {len(added_tradepairs)} tradepairs")
-    return jsonify({'added_tradepairs': added_tradepairs})
+    added_tradepairs, delisted_tradepairs = parseNewTradepairs()
+    return jsonify({'added_tradepairs': added_tradepairs, 'delisted_tradepairs': delisted_tradepairs})
 
 @app.route('/candles/update', methods=['POST'])
 def fetch_new_candles():
-    logger.info("Loading tradepairs...")
-    tradepairs = crud.selectTradepairs(True)
-    
-    #! just for debugging
-    tradepairs = tradepairs[:60]
-    
-    logger.debug(f"{len(tradepairs)} tradepairs loaded")
-    logger.info("Fetching candles...")
-    tradepair_names = list(map(lambda x: x['name'], tradepairs))
-    new_candles = []
-    for tradepair_name in tradepair_names:
-        try:
-            candles = binance.getTradepairCandles(tradepair_name)
-            new_candles.append(candles)
-            logger.debug(f"Fetched {len(candles)} candles for {tradepair_name}")
-        except Exception as e:
-            logger.error(e)
-            return Response(f'Some error occured while loading candles for {tradepair_name}. Check logs for more info', status=500)
-    logger.info("Uploading candles to db...")
-    added_candles = crud.addCandles(new_candles)
+    try:
+        added_candles = parseNewCandles()
+    except RuntimeError as e:
+        logger.error(e)
+        return Response('Some error occured while loading candles. Check logs for more info', status=500)
     return jsonify({'added_candles_number': len(added_candles)})
     
-def processSwings(tradepair_name: str, timeframe: str):
+def reportSwings(series) -> list[dict]:
     """
-    Process candles to detect new swing formations and add them if necessary.
-    A swing is identified by a 5-candle pattern where the middle one has a local extremum.
+    Detect the new swings of every (tradepair_name, timeframe) of `series`,
+    store them in one batch and queue them for the bot (see `notify`).
     """
-    candles = crud.selectCandles(tradepair_name, timeframe)
-    if len(candles) < 5:
-        return
+    series = list(series)
+    detected_swings, watermarks = [], {}
+    #? swings of series scanned for the first time are their history, stored without alerting the bot
+    history_swings, history_watermarks = [], {}
+
+    with metrics.update_stage_seconds.labels('detect swings').time():
+        #? one index lookup per timeframe validates the cached series of every tradepair
+        latest = {}
+        for timeframe in {timeframe for _, timeframe in series}:
+            tradepair_names = [name for name, series_timeframe in series if series_timeframe == timeframe]
+            latest.update({(name, timeframe): datetime_open
+                           for name, datetime_open in crud.selectLatestCandleOpens(timeframe, tradepair_names).items()})
+
+        for tradepair_name, timeframe in series:
+            with metrics.swing_detection_seconds.labels(timeframe).time():
+                detected, watermark, first_scan = swings.detectNewSwings(tradepair_name, timeframe,
+                                                                         latest.get((tradepair_name, timeframe)))
+            if watermark is None:
+                continue
+            if first_scan:
+                history_swings.extend(detected)
+                history_watermarks[(tradepair_name, timeframe)] = watermark
+            else:
+                detected_swings.extend(detected)
+                watermarks[(tradepair_name, timeframe)] = watermark
+
+    with metrics.update_stage_seconds.labels('persist swings').time():
+        new_swings = crud.addSwings(detected_swings, watermarks)
+        if history_watermarks:
+            history = crud.addSwings(history_swings, history_watermarks, notify=False)
+            logger.info(f"Added {len(history)} swings of {len(history_watermarks)} series scanned for the first time")
+    logger.info(f"Added {len(new_swings)} new swings")
 
-    added_swings = []
-    for i in range(2, len(candles) - 2):
-        c1, c2, c3, c4, c5 = candles[i - 2:i + 3]
-        
-        added_swing = None
-        
-        # Detect local high (swing high)
-        if c3['high'] > c1['high'] and c3['high'] > c2['high'] and c3['high'] > c4['high'] and c3['high'] > c5['high']:
-            added_swing = crud.addSwing(tradepair_name, timeframe, candles, orientation_up=True)
-
-        # Detect local low (swing low)
-        if c3['low'] < c1['low'] and c3['low'] < c2['low'] and c3['low'] < c4['low'] and c3['low'] < c5['low']:
-            added_swing = crud.addSwing(tradepair_name, timeframe, candles, orientation_up=False)
-
-        if added_swing:
-            added_swings.append(added_swing)
-            
-    logger.info(f"Added {len(added_swings)} new swings for {tradepair_name} ({timeframe})")
-    return added_swings
+    if new_swings:
+        notify.notifySwings()
+    return new_swings
 
-def update():
+def update(timeframes: list[str] = None, tradepair_names: list[str] = None):
     """
-    Fetch new candles, process swings, and send swing updates to the bot.
+    Fetch new candles, process swings, and queue swing updates for the bot.
+    Only `timeframes` are updated when given, e.g. the ones whose candle just closed,
+    and only the tracked tradepairs among `tradepair_names`, e.g. the shard of a worker.
     """
-    logger.info("Starting update process...")
+    timeframes = timeframes or TIMEFRAMES
+    logger.info(f"Starting update process of {', '.join(timeframes)}...")
 
-    # Step 1: Fetch new candles
-    fetch_new_candles()
+    #? failed runs are timed too, the histogram observes on the way out
+    with metrics.update_run_seconds.time():
+        # Step 1: Fetch new candles
+        try:
+            parseNewCandles(timeframes, tradepair_names)
+        except RuntimeError as err:
+            metrics.update_failures.inc()
+            logger.error(err)
+            return
+
+        # Step 2: Detect, store and queue the swings of every tracked tradepair and timeframe
+        tradepairs = [tp['name'] for tp in crud.selectTradepairs(True)]
+        if tradepair_names is not None:
+            tradepairs = sorted(set(tradepairs) & set(tradepair_names))
+        reportSwings((name, timeframe) for name in tradepairs for timeframe in timeframes)
 
-    # Step 2: Process swings for each tradepair and timeframe
-    tradepairs = crud.selectTradepairs(True)
-    tradepair_names = [tp['name'] for tp in tradepairs]
+    logger.info("Update process completed.")
 
-    new_swings = []  # Store newly detected swings
+def processClosedCandles(candles: CandleBatch) -> list[dict]:
+    """
+    Store candles closed on the kline stream, build the derived timeframes
+    candles they complete and report the swings of the updated series.
+    """
+    _, derived = resample.planTimeframes(TIMEFRAMES)
 
-    for tradepair_name in tradepair_names:
-        swings = processSwings(tradepair_name, '1w')
-        new_swings.extend(swings)
+    added_candles = [crud.addCandles(candles)]
+    for name, base in derived.items():
+        added = added_candles[0][added_candles[0].timeframe_name == base]
+        if len(added):
+            added_candles.append(crud.addCandles(resample.resampleNewCandles(added, name)))
 
-    # Step 3: Send new swing data to bot
-    if new_swings:
-        send_swings_to_bot(new_swings)
+    added_candles = CandleBatch.concat(added_candles)
+    if not len(added_candles):
+        return []
+    logger.info(f"Added {len(added_candles)} streamed candles")
+    return reportSwings([key for key, _ in added_candles.series()])
 
-    logger.info("Update process completed.")
+def fillStreamGap(closed: queue.Queue, kline_stream: stream.KlineStream, last_message: float | None):
+    """
+    Queue the candles of `kline_stream` that closed while it was not connected.
+    On the first connection the last `binance.CANDLES_LIMIT` candles are fetched.
+    """
+    series = defaultdict(list)
+    for tradepair_name, timeframe in kline_stream.series:
+        series[timeframe].append(tradepair_name)
+
+    for timeframe, tradepair_names in series.items():
+        limit = binance.CANDLES_LIMIT
+        if last_message is not None:
+            missed = (time.time() - last_message) / binance.INTERVALS[timeframe].total_seconds()
+            limit = min(math.ceil(missed) + 1, binance.MAX_CANDLES_LIMIT)
+        try:
+            candles = binance.getCandles(tradepair_names, interval=timeframe, limit=limit)
+        except RuntimeError as err:
+            logger.error(f"Could not fetch the {timeframe} candles missed by the stream: {err}")
+            continue
+        closed.put(candles)
+
+def pollClosedCandles(closed: queue.Queue, timeframes: list[str]):
+    """Queue the latest closed candles of the tracked tradepairs in timeframes that are not streamed"""
+    tradepair_names = [tp['name'] for tp in crud.selectTradepairs(True)]
+    for timeframe in timeframes:
+        try:
+            candles = binance.getCandles(tradepair_names, interval=timeframe, limit=binance.CANDLES_LIMIT)
+        except RuntimeError as err:
+            logger.error(f"Could not fetch the closed {timeframe} candles: {err}")
+            continue
+        closed.put(candles)
+
+def processStream(closed: queue.Queue):
+    """Process closed candles in batches of the candles closing together"""
+    while True:
+        batch = [closed.get()]
+        deadline = time.monotonic() + STREAM_BATCH_DELAY
+        while (timeout := min(deadline - time.monotonic(), STREAM_BATCH_IDLE)) > 0:
+            try:
+                batch.append(closed.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        batch = CandleBatch.concat(batch)
+        try:
+            processClosedCandles(batch)
+        except Exception as err:
+            logger.error(f"Could not process {len(batch)} streamed candles: {err}")
 
-def send_swings_to_bot(swings):
+def startStream():
     """
-    Send newly detected swing specifications to the bot.
+    Ingest closed candles from the binance kline streams of every tracked
+    tradepair and report swings as soon as the candles forming them close.
+
+    Only the fetched timeframes are streamed, the derived ones are resampled.
+    Fetched timeframes the UTC streams are not aligned with are fetched
+    from the REST api right after their candles close instead.
+    Tracked tradepairs are reloaded every `STREAM_REFRESH_INTERVAL` seconds
+    and the streams are reopened when they change.
     """
-    payload = [{"tradepair": s.tradepair_name, "timeframe": s.timeframe_name, "swing_type": "high" if s.orientation_up else "low"}
-               for s in swings]
+    logger.info("Starting kline stream...")
+    fetched, _ = resample.planTimeframes(TIMEFRAMES)
+    streamed = [timeframe for timeframe in fetched if stream.alignedToUtc(timeframe)]
+    polled = [timeframe for timeframe in fetched if timeframe not in streamed]
+    crud.addTimeframes({name: binance.INTERVALS[name] for name in TIMEFRAMES})
+
+    notify.startNotifier()
+    metrics.startMetricsServer()
+    closed = queue.Queue()
+    threading.Thread(target=processStream, args=(closed,), daemon=True).start()
+
+    def onConnect(kline_stream, last_message):
+        threading.Thread(target=fillStreamGap, args=(closed, kline_stream, last_message), daemon=True).start()
+
+    if polled:
+        logger.info(f"Fetching {', '.join(polled)} klines at their closes, the UTC streams are not aligned with them")
+        threading.Thread(target=scheduler.runAtCandleCloses, args=(lambda timeframes: pollClosedCandles(closed, timeframes), polled),
+                         daemon=True).start()
+
+    kline_streams = []
+    tracked = None
+    while True:
+        tradepair_names = sorted(tp['name'] for tp in crud.selectTradepairs(True))
+        if tradepair_names != tracked:
+            for kline_stream in kline_streams:
+                kline_stream.stop()
 
-    try:
-        response = requests.post(f"http://{BOT_SERVER_URL}/swing-updates", json=payload)
-        if response.status_code == 200:
-            logger.info("Bot successfully updated with new swings.")
-        else:
-            logger.error(f"Failed to update bot: {response.text}")
-    except Exception as e:
-        logger.error(f"Error sending swing update to bot: {e}")
+            series = [(name, timeframe) for name in tradepair_names for timeframe in streamed]
+            kline_streams = [
+                stream.KlineStream(series[start:start + stream.MAX_STREAMS], on_candle=closed.put, on_connect=onConnect).start()
+                for start in range(0, len(series), stream.MAX_STREAMS)
+            ]
+            tracked = tradepair_names
+            if streamed:
+                logger.info(f"Streaming {', '.join(streamed)} klines of {len(tradepair_names)} tradepairs")
+
+        time.sleep(STREAM_REFRESH_INTERVAL)
 
 
 def schedule_update():
     """
-    Schedule `update()` to run periodically.
+    Run `update()` for the timeframes closing, right after each candle close.
     """
-    schedule.every().monday.at("05:00", 'Europe/London').do(update)
-
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Wait a minute before checking again
+    scheduler.runAtCandleCloses(update)
         
 
 def startServer():
@@ -208,27 +427,18 @@ def startServer():
     Start the Flask server and schedule background tasks.
     """
     logger.info("Starting Updater server...")
-    threading.Thread(target=schedule_update, daemon=True).start()  # Run scheduler in a background thread
+    notify.startNotifier()
+    if SCHEDULE_UPDATES:
+        threading.Thread(target=schedule_update, daemon=True).start()  # Run scheduler in a background thread
     app.run(host='127.0.0.1', port=7669, debug=True, use_reloader=False)
     
 
-class Swing():
-    def __init__(self, tradepair_name, timeframe_name, orientation_up):
-        self.tradepair_name = tradepair_name
-        self.timeframe_name = timeframe_name
-        self.orientation_up = orientation_up
-    
-
 def debug():
-    swing1 = Swing('BTCUSDT', '1w', True)
-    swing2 = Swing('ALTUSDT', '1s', False)
-    swing3 = Swing('ETHUSDT', '1h', True)
-    
-    
     swings = [
-        swing1, swing2, swing3
+        {'id': None, 'tradepair_name': 'BTCUSDT', 'timeframe_name': '1w', 'orientation_up': True},
+        {'id': None, 'tradepair_name': 'ALTUSDT', 'timeframe_name': '1s', 'orientation_up': False},
+        {'id': None, 'tradepair_name': 'ETHUSDT', 'timeframe_name': '1h', 'orientation_up': True},
     ]
-    send_swings_to_bot(swings)
+    notify.postSwings(swings)
     #print(BOT_SERVER_URL)
     #requests.get(f"http://{BOT_SERVER_URL}/debug")
-    
\ No newline at end of file
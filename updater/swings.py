@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from updater.api import binance
+from updater.db import crud
+
+#? a swing is a 5-candle window whose middle candle holds the extremum
+SWING_RADIUS = 2
+SWING_WINDOW = 2 * SWING_RADIUS + 1
+
+
+def loadSeries(tradepair_name: str, timeframe: str, since: datetime = None,
+               latest: datetime = None) -> tuple[list, np.ndarray, np.ndarray]:
+    """
+    Load the candle series of a tradepair/timeframe in chronological order.
+
+    With `since` (a watermark) only the candles opened after it are loaded,
+    preceded by the `SWING_WINDOW - 1` candles needed to complete the windows
+    they belong to. Every window of such a series contains a new candle,
+    so windows evaluated by a previous run are not scanned again.
+    `latest` is the open datetime of the latest stored candle, it validates
+    the cached series (see `crud.selectCandleSeries()`).
+
+    Returns
+    -------
+    tuple[list[datetime], np.ndarray, np.ndarray]
+        Candle open datetimes, highs and lows.
+    """
+    columns = crud.selectCandleSeries(tradepair_name, timeframe, since=since, lookback=SWING_WINDOW - 1, latest=latest)
+    return columns['datetime_open'].astype(object).tolist(), columns['high'], columns['low']
+
+def detectSwings(highs: np.ndarray, lows: np.ndarray, radius: int = SWING_RADIUS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find every swing high and swing low of a series in one vectorized pass.
+
+    A window of `2 * radius + 1` candles is a swing high when its middle high
+    is strictly greater than every other high of the window, and a swing low
+    when its middle low is strictly lower than every other low.
+
+    Parameters
+    ----------
+    highs : np.ndarray
+        High prices in chronological order.
+    lows : np.ndarray
+        Low prices, same length and order as `highs`.
+    radius : int
+        Candles on each side of the middle one.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Start indices of swing high windows and of swing low windows,
+        the window itself is `series[start:start + 2 * radius + 1]`.
+    """
+    width = 2 * radius + 1
+    if len(highs) < width:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    high_windows = sliding_window_view(highs, width)
+    low_windows = sliding_window_view(lows, width)
+
+    high_pivots = high_windows[:, radius]
+    low_pivots = low_windows[:, radius]
+
+    swing_highs = (
+        (high_pivots > high_windows[:, :radius].max(axis=1)) &
+        (high_pivots > high_windows[:, radius + 1:].max(axis=1))
+    )
+    swing_lows = (
+        (low_pivots < low_windows[:, :radius].min(axis=1)) &
+        (low_pivots < low_windows[:, radius + 1:].min(axis=1))
+    )
+    return np.flatnonzero(swing_highs), np.flatnonzero(swing_lows)
+
+def detectNewSwings(tradepair_name: str, timeframe: str, latest: datetime = None) -> tuple[list[dict], datetime | None, bool]:
+    """
+    Detect the swings formed since the series watermark, `latest` as in `loadSeries()`.
+
+    Returns
+    -------
+    tuple[list[dict], datetime | None, bool]
+        Swings in the shape `crud.addSwings()` expects, the new watermark
+        (None when the series has no candles after the current one) and
+        whether this was the first scan of the series, i.e. the swings are
+        its history rather than new ones.
+    """
+    watermark = crud.selectSwingWatermark(tradepair_name, timeframe)
+    datetimes, highs, lows = loadSeries(tradepair_name, timeframe, since=watermark, latest=latest)
+    if not datetimes or datetimes[-1] == watermark:
+        return [], None, watermark is None
+
+    return seriesSwings(tradepair_name, timeframe, datetimes, highs, lows), datetimes[-1], watermark is None
+
+def detectRangeSwings(tradepair_name: str, timeframe: str, since: datetime, until: datetime) -> tuple[list[dict], datetime | None]:
+    """
+    Detect the swings of backfilled candles, opened between `since` and `until`.
+
+    Windows completed at or before the watermark were never scanned by
+    `detectNewSwings()` since their candles were missing. Backfilled candles
+    past the watermark (or of a series without one) are history too, their
+    windows are detected up to `until` and the watermark moves there, so
+    `detectNewSwings()` does not report them as new.
+
+    Returns
+    -------
+    tuple[list[dict], datetime | None]
+        Swings in the shape `crud.addSwings()` expects and the new watermark,
+        None when it stays where it is.
+    """
+    watermark = crud.selectSwingWatermark(tradepair_name, timeframe)
+    moved = until if watermark is None or until > watermark else None
+    limit = moved or watermark
+
+    interval = binance.INTERVALS[timeframe]
+    start = since if watermark is None else min(since, watermark)
+    columns = crud.selectCandleColumns(tradepair_name, timeframe, oldest_first=True,
+                                       since=start - interval * (SWING_WINDOW - 1),
+                                       until=until + interval * SWING_WINDOW)
+    datetimes = columns['datetime_open'].astype(object).tolist()
+    detected = [swing for swing in seriesSwings(tradepair_name, timeframe, datetimes, columns['high'], columns['low'])
+                if swing['candles'][-1] <= limit]
+    return detected, moved
+
+def seriesSwings(tradepair_name: str, timeframe: str, datetimes: list, highs: np.ndarray, lows: np.ndarray) -> list[dict]:
+    """Swings of a loaded series in the shape `crud.addSwings()` expects"""
+    swing_highs, swing_lows = detectSwings(highs, lows)
+    return [
+        {
+            'tradepair_name': tradepair_name,
+            'timeframe_name': timeframe,
+            'orientation_up': orientation_up,
+            'pivot_datetime_open': datetimes[start + SWING_RADIUS],
+            'candles': datetimes[start:start + SWING_WINDOW],
+        }
+        for starts, orientation_up in ((swing_highs, True), (swing_lows, False))
+        for start in starts
+    ]
@@ -0,0 +1,176 @@
+"""
+Updater workers sharing the scheduled updates through the database.
+
+Tradepairs are hashed into `UPDATER_SHARDS` shards and every worker leases
+its share of them in the `shard_lease` table: a fair share is the shard
+count divided by the live workers, a worker over it releases shards and
+one under it claims the free ones. Leases are renewed on every heartbeat,
+the shards of a worker that stops renewing them are taken over once they
+expire, so workers on any host rebalance as they join and leave.
+
+A worker only updates the tradepairs of the shards it holds a lease on,
+and stops using a lease before it can expire, so two workers never update
+the same tradepair at once.
+"""
+import os
+import zlib
+import math
+import time
+import uuid
+import socket
+import logging
+import threading
+from datetime import timedelta
+
+from updater.db import crud
+from updater import server, notify, scheduler, metrics
+from updater.config import UPDATER_SHARDS, WORKER_LEASE_TTL
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.INFO)
+console_handler.setFormatter(logging.Formatter(
+  "{asctime} - {levelname} - {message}",
+  style="{",
+  datefmt="%Y-%m-%d %H:%M",
+))
+logger.addHandler(console_handler)
+
+#? heartbeats per lease ttl, a couple of them can fail before the leases expire
+HEARTBEATS_PER_TTL = 3
+#? fraction of the ttl a lease has to have left for its shards to be updated
+LEASE_MARGIN = 0.2
+
+
+def tradepairShard(tradepair_name: str, shards: int = UPDATER_SHARDS) -> int:
+    #? crc32 is stable across processes and hosts, unlike hash()
+    return zlib.crc32(tradepair_name.encode()) % shards
+
+
+class ShardWorker:
+    """
+    Worker leasing a share of the tradepair shards.
+
+    Parameters
+    ----------
+    shards : int
+        Number of shards the tradepairs are split into, the same for every worker.
+    ttl : float
+        Seconds the leases last without being renewed.
+    """
+
+    def __init__(self, shards: int = UPDATER_SHARDS, ttl: float = WORKER_LEASE_TTL):
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.shards = shards
+        self.ttl = timedelta(seconds=ttl)
+
+        self.lock = threading.Lock()
+        self.owned = set()
+        self.busy = set()
+        #? monotonic time the leases are valid until, as of the last successful heartbeat
+        self.valid_until = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self) -> "ShardWorker":
+        self.heartbeat()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop heartbeating and hand the shards over right away"""
+        self.stopped.set()
+        self.thread.join()
+        with self.lock:
+            self.owned, self.valid_until = set(), 0
+        crud.deleteWorker(self.id)
+        logger.info(f"Worker {self.id} stopped")
+
+    def run(self):
+        interval = self.ttl.total_seconds() / HEARTBEATS_PER_TTL
+        while not self.stopped.wait(interval):
+            try:
+                self.heartbeat()
+            except Exception as err:
+                logger.error(f"Worker heartbeat failed: {err}")
+
+    def heartbeat(self):
+        """Renew the leases, then release or claim shards to get to a fair share"""
+        started = time.monotonic()
+        workers = crud.heartbeatWorker(self.id, self.ttl)
+        owned = set(crud.renewShardLeases(self.id, self.ttl))
+        fair_share = math.ceil(self.shards / workers)
+
+        with self.lock:
+            lost = self.owned - owned
+            #? shards being updated are kept, they are released on a later heartbeat
+            surplus = sorted(owned - self.busy, reverse=True)[:max(len(owned) - fair_share, 0)]
+            self.owned = owned - set(surplus)
+            self.valid_until = started + self.ttl.total_seconds()
+        if lost:
+            logger.warning(f"Lost the leases of shards {sorted(lost)}")
+
+        if surplus:
+            crud.releaseShards(self.id, surplus)
+        elif len(owned) < fair_share:
+            claimed = crud.claimShards(self.id, self.shards, fair_share - len(owned), self.ttl)
+            if claimed:
+                self.forgetCandles(claimed)
+            with self.lock:
+                self.owned |= set(claimed)
+
+        if surplus or lost or len(self.owned) != len(owned):
+            logger.info(f"Worker {self.id} holds {len(self.owned)} of {self.shards} shards ({workers} workers)")
+
+    def forgetCandles(self, shards: list[int]):
+        """Drop the cached candles of the tradepairs of shards other workers may have updated"""
+        shards = set(shards)
+        for tp in crud.selectTradepairs():
+            if tradepairShard(tp['name'], self.shards) in shards:
+                crud.candle_cache.invalidate(tp['name'])
+
+    def claimUsableShards(self) -> set[int]:
+        """
+        Mark the shards whose leases are safe to use for a while as busy and
+        return them, none when the leases may be about to expire. Busy shards
+        are not released by the heartbeat until `releaseBusyShards()`.
+        """
+        with self.lock:
+            if self.valid_until - time.monotonic() < self.ttl.total_seconds() * LEASE_MARGIN:
+                return set()
+            shards = set(self.owned)
+            self.busy |= shards
+            return shards
+
+    def releaseBusyShards(self, shards: set[int]):
+        with self.lock:
+            self.busy -= shards
+
+    def update(self, timeframes: list[str]):
+        """`server.update()` of the tracked tradepairs of the owned shards"""
+        shards = self.claimUsableShards()
+        try:
+            if not shards:
+                logger.warning(f"Worker {self.id} holds no shards, skipping the {', '.join(timeframes)} update")
+                return
+            tradepair_names = [tp['name'] for tp in crud.selectTradepairs(True) if tradepairShard(tp['name'], self.shards) in shards]
+            server.update(timeframes, tradepair_names)
+        finally:
+            self.releaseBusyShards(shards)
+
+
+def startWorker():
+    """
+    Run the scheduled updates of this worker's share of the tradepairs,
+    alongside any number of workers on this or other hosts.
+    """
+    worker = ShardWorker().start()
+    logger.info(f"Worker {worker.id} started with {len(worker.owned)} of {worker.shards} shards")
+    notify.startNotifier()
+    metrics.startMetricsServer()
+    try:
+        scheduler.runAtCandleCloses(worker.update)
+    except KeyboardInterrupt:
+        worker.stop()
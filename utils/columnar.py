@@ -0,0 +1,108 @@
+"""
+Columnar binary encodings of query results, loadable straight into numpy arrays.
+
+`COLUMNS_MIMETYPE` is a stream of frames, each one a batch of rows:
+
+    b"OVC1"                                   stream magic, once
+    uint32 little-endian header length        0 ends the stream
+    JSON header                               {"rows": n, "columns": [[name, dtype], ...], "metadata": {...}}
+    column buffers                            raw little-endian values, in header order
+
+`ARROW_MIMETYPE` is the Arrow IPC stream format, offered when pyarrow is installed.
+"""
+import io
+import json
+import struct
+from typing import Iterable, Iterator
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+COLUMNS_MIMETYPE = "application/vnd.overseer.columns"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+MAGIC = b"OVC1"
+HEADER_LENGTH = struct.Struct("<I")
+
+
+def encodeFrame(columns: dict[str, np.ndarray], metadata: dict = None) -> bytes:
+    arrays = {name: np.ascontiguousarray(column, dtype=column.dtype.newbyteorder('<')) for name, column in columns.items()}
+    header = json.dumps({
+        'rows': len(next(iter(arrays.values()))) if arrays else 0,
+        'columns': [[name, array.dtype.str] for name, array in arrays.items()],
+        'metadata': metadata or {},
+    }).encode()
+    return b"".join([HEADER_LENGTH.pack(len(header)), header, *(array.tobytes() for array in arrays.values())])
+
+def columnChunks(batches: Iterable[dict[str, np.ndarray]], metadata: dict = None) -> Iterator[bytes]:
+    """Encode batches of columns as a `COLUMNS_MIMETYPE` stream, one chunk per batch"""
+    yield MAGIC
+    for batch in batches:
+        yield encodeFrame(batch, metadata)
+    yield HEADER_LENGTH.pack(0)
+
+def readColumns(stream) -> tuple[dict[str, np.ndarray], dict]:
+    """
+    Read a whole `COLUMNS_MIMETYPE` stream from a binary file-like object
+    (e.g. `io.BytesIO(response.content)` or `response.raw`).
+
+    Returns
+    -------
+    tuple[dict[str, np.ndarray], dict]
+        Columns of all the batches concatenated and the metadata of the stream.
+    """
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a columns stream")
+
+    batches, metadata = [], {}
+    while True:
+        (length,) = HEADER_LENGTH.unpack(readExactly(stream, HEADER_LENGTH.size))
+        if length == 0:
+            break
+        header = json.loads(readExactly(stream, length))
+        metadata = header['metadata']
+        batch = {}
+        for name, dtype in header['columns']:
+            dtype = np.dtype(dtype)
+            batch[name] = np.frombuffer(readExactly(stream, dtype.itemsize * header['rows']), dtype=dtype)
+        batches.append(batch)
+
+    if not batches:
+        return {}, metadata
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}, metadata
+
+def readExactly(stream, size: int) -> bytes:
+    data = stream.read(size)
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise EOFError("Columns stream ended unexpectedly")
+        data += chunk
+    return data
+
+def arrowChunks(batches: Iterable[dict[str, np.ndarray]], metadata: dict = None) -> Iterator[bytes]:
+    """Encode batches of columns as an Arrow IPC stream, one chunk per batch"""
+    sink = io.BytesIO()
+    writer = None
+    for batch in batches:
+        record_batch = pyarrow.record_batch(list(batch.values()), names=list(batch))
+        if writer is None:
+            schema = record_batch.schema.with_metadata(
+                {key: str(value) for key, value in (metadata or {}).items() if value is not None})
+            writer = pyarrow.ipc.new_stream(sink, schema)
+        writer.write_batch(record_batch)
+        yield takeBuffer(sink)
+    if writer is not None:
+        writer.close()
+        yield takeBuffer(sink)
+
+def takeBuffer(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,55 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 30))
+
+
+class PooledSession(requests.Session):
+    """
+    `requests.Session` bound to a single host, keeping up to `pool_size`
+    keep-alive connections open and applying default timeouts to every request.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE,
+                 timeout: tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        super().__init__()
+        self.timeout = timeout
+        #? pool_block makes extra threads wait for a free connection instead of opening throwaway ones
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+sessions: dict[str, PooledSession] = {}
+sessions_lock = threading.Lock()
+
+def getHttpSession(url: str) -> PooledSession:
+    """Return the process-wide session for the host of `url`, creating it on first use"""
+    if "://" not in url:
+        url = "http://" + url
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+
+    with sessions_lock:
+        if host not in sessions:
+            sessions[host] = PooledSession()
+        return sessions[host]
+
+def closeHttpSessions():
+    with sessions_lock:
+        for session in sessions.values():
+            session.close()
+        sessions.clear()